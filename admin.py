@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import socket
+import sys
+import time
+from threading import Thread
+
+from config import get_config, set_config, save_config
+
+# Comandos comunes a la shell interactiva y al socket de administración
+available_commands = [
+    "raft show", "mq show", "help", "exit",
+    "config show", "config set",
+    "profile start", "profile stop", "profile dump", "profile ticks",
+    "game top", "game player", "game match"
+]
+
+
+def render_command(raft, line):
+    """
+    Ejecuta un comando de consulta y devuelve el texto a mostrar,
+    o None si el comando no se reconoce. "exit" lo gestiona cada interfaz.
+    """
+    from raft.server import message_queue
+
+    if line == "raft show" and hasattr(raft, "groups"):
+        output = [f"[Multi-Raft STATUS] {len(raft.groups)} grupos"]
+        for node in raft.groups:
+            output.append(f"  G{node.group:<3} {node.fsm.state:<10} término {node.term:<4} "
+                          f"journal {len(node.journal)} commit {node.commit_index} aplicado {node.last_applied}")
+        output.append(f"  Grupos liderados: {raft.leaders()}")
+        return "\n".join(output)
+
+    elif line == "raft show":
+        output = ["[Raft STATUS]"]
+        output.append(f"  Estado LE:        {raft.fsm.state}")
+        output.append(f"  Término actual:   {raft.term}")
+        output.append(f"  Votado por:       {raft.voted_for}")
+        output.append(f"  Soy líder:        {'sí' if raft.is_leader() else 'no'}")
+        output.append(f"  Modo lectura:     {raft.read_mode}")
+        output.append(f"  Commit index:     {raft.commit_index}")
+        output.append(f"  Aplicado hasta:   {raft.last_applied} "
+                      f"({raft.applier.backlog(raft.commit_index)} pendientes)")
+        sessions = raft.applier.sessions
+        output.append(f"  Sesiones:         {len(sessions)} (duplicados {sessions.hits}, "
+                      f"desalojos {sessions.evictions})")
+        if raft.is_leader() and raft.read_mode == "lease":
+            remaining = max(0, raft.reads.lease_expires - time.time())
+            output.append(f"  Lease restante:   {remaining:.2f} segundos")
+        if raft.is_leader():
+            from raft.server import peers
+            output.append("  Followers:")
+            for voter in raft.others:
+                mode = "sondeo" if voter in raft.probing else "replicando"
+                row = (f"    {voter:<21} match {raft.match_index.get(voter, 0):<8} "
+                       f"next {raft.next_index.get(voter, 0):<8} "
+                       f"en vuelo {len(raft.inflight.get(voter, ()))} ({mode})")
+                peer = peers.get(voter)
+                if peer is not None:
+                    row += f", cola {peer.queued} B, descartadas {peer.dropped}"
+                output.append(row)
+        if raft.fsm.state in ("follower", "candidate"):
+            remaining = max(0, raft.election_timeout - time.time())
+            output.append(f"  Timeout en:       {remaining:.2f} segundos")
+        if raft.fsm.state == "candidate":
+            output.append(f"  Votos recibidos:  {raft.votes_received}")
+        return "\n".join(output)
+
+    elif line == "mq show":
+        output = ["[Message Queue]"]
+        if message_queue.empty():
+            output.append("  (vacía)")
+        else:
+            for i, (addr, msg) in enumerate(list(message_queue.queue)):
+                output.append(f"  [{i}] {addr}: {msg}")
+        return "\n".join(output)
+
+    elif line == "help":
+        output = ["Comandos disponibles:"]
+        for cmd in available_commands:
+            output.append(f"  {cmd}")
+        return "\n".join(output)
+
+    elif line == "config show":
+        return json.dumps(get_config(), indent=2)
+
+    elif line.startswith("profile"):
+        from profiler import profile_command
+        return profile_command(raft, line)
+
+    elif line.startswith("game"):
+        from game.views import game_command
+        return game_command(raft, line)
+
+    elif line.startswith("config set"):
+        try:
+            new_values = json.loads(line[len("config set"):].strip())
+            set_config(new_values)
+            save_config()
+            return "Configuration updated."
+        except json.JSONDecodeError:
+            return "Invalid JSON."
+
+    return None
+
+
+def handle_admin_client(conn, raft, done):
+    with conn:
+        line = conn.makefile('r', encoding='utf-8').readline().strip()
+        if line == "exit":
+            done.set()
+            output = "Bye."
+        else:
+            try:
+                output = render_command(raft, line)
+            except Exception as e:
+                # Sin esto el cliente solo vería la conexión cerrada, sin respuesta
+                logging.exception(f"Error en el comando de administración {line!r}")
+                output = f"Error al ejecutar {line}: {e}"
+            if output is None:
+                output = f"Comando no reconocido: {line}"
+        conn.sendall((output + "\n").encode('utf-8'))
+
+
+def start_admin_server(raft, done, path):
+    """
+    Socket Unix local: un comando por conexión, la respuesta se devuelve y se cierra.
+    Ejemplo: echo "raft show" | nc -U <path>
+    """
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(5)
+    logging.info(f"Admin escuchando en {path}")
+
+    def serve():
+        while not done.is_set():
+            conn, _ = server.accept()
+            Thread(target=handle_admin_client, args=(conn, raft, done), daemon=True).start()
+
+    Thread(target=serve, daemon=True).start()
+
+
+def send_admin_command(path, line):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(path)
+        s.sendall((line + "\n").encode('utf-8'))
+        chunks = []
+        while True:
+            data = s.recv(4096)
+            if not data:
+                break
+            chunks.append(data)
+    return b''.join(chunks).decode('utf-8')
+
+
+# Cliente mínimo: python admin.py <socket> raft show
+if __name__ == "__main__":
+    print(send_admin_command(sys.argv[1], " ".join(sys.argv[2:])), end="")
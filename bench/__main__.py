@@ -0,0 +1,114 @@
+"""
+Suite de benchmarks: fsm, journal, codecs y transporte.
+
+    python -m bench                          ejecuta todo y compara con bench/baseline.json
+    python -m bench -k journal               solo los casos cuyo nombre contiene "journal"
+    python -m bench -o results.json          guarda los resultados en JSON
+    python -m bench --update-baseline        reescribe la línea base con esta ejecución
+    python -m bench --threshold 0.1          regresión = empeora más de un 10 %
+    python -m bench --runs 3                 mediana de tres ejecuciones por caso
+
+Termina con código 1 si algún caso empeora más que el umbral respecto a la
+línea base. Un caso de la línea base puede fijar su propio "threshold" (los
+que dependen del planificador de hilos son más ruidosos); --runs N usa la
+mediana de N ejecuciones. Los benchmarks individuales (bench.bench_reads,
+...) se siguen pudiendo ejecutar por separado para ver todos sus modos.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+
+from bench.cases import CASES
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+
+def run_cases(pattern=None, runs=1):
+    results = {}
+    for name, fn in CASES.items():
+        if pattern and pattern not in name:
+            continue
+        values = []
+        for _ in range(runs):
+            value, unit, higher_is_better = fn()
+            values.append(value)
+        value = statistics.median(values)
+        results[name] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+        print(f"{name:<28} {value:14.2f} {unit}", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Devuelve la lista de (caso, valor base, valor actual, cambio relativo) que empeoran.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (result["value"] - base["value"]) / base["value"]
+        worse = -change if result["higher_is_better"] else change
+        if worse > base.get("threshold", threshold):
+            regressions.append((name, base["value"], result["value"], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.splitlines()[1])
+    parser.add_argument("-k", dest="pattern", help="ejecuta solo los casos que contienen este texto")
+    parser.add_argument("-o", "--output", help="fichero JSON de resultados")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--runs", type=int, default=1, help="ejecuciones por caso (se usa la mediana)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = run_cases(args.pattern, args.runs)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        previous = baseline.get("results", {})
+        baseline.update(report)
+        for name, result in results.items():
+            if "threshold" in previous.get(name, {}):
+                result["threshold"] = previous[name]["threshold"]
+        baseline["results"] = {**previous, **results}
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"Línea base actualizada: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Sin línea base en {args.baseline}; usa --update-baseline para crearla")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, base, value, change in regressions:
+        print(f"REGRESIÓN {name}: {base:.2f} -> {value:.2f} ({change:+.1%})")
+    if not regressions:
+        print(f"Sin regresiones (umbral {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
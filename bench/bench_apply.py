@@ -0,0 +1,131 @@
+"""
+Benchmark de la etapa de aplicación: jitter de heartbeats y latencia commit -> aplicación.
+
+Un líder de un solo nodo (compromete en cuanto escribe) recibe lotes de
+propuestas sin pausa desde otro hilo mientras su bucle llama a fire() cada
+milisegundo. La máquina de estados simula una aplicación cara (--apply-us
+por entrada: puntuación, persistencia, notificaciones).
+
+  inline     las entradas comprometidas se aplican en el bucle, tras cada fire()
+  pipelined  ApplyWorker en su propio hilo, con cola acotada y contrapresión
+
+Uso: python -m bench.bench_apply [--seconds S] [--apply-us US] [--heartbeat-ms MS]
+"""
+import argparse
+import logging
+import queue
+import threading
+import time
+
+from config import get_config
+from raft.raft import RaftNode
+
+
+class HeartbeatRecorder:
+    """
+    Sustituye al transporte: solo anota cuándo sale cada heartbeat.
+    """
+
+    def __init__(self):
+        self.times = []
+
+    def send(self, group, msg, payload=b''):
+        if msg.startswith("AppendEntries "):
+            self.times.append(time.perf_counter())
+
+
+class SlowMachine:
+    def __init__(self, apply_us, proposed):
+        self.cost = apply_us / 1e6
+        self.proposed = proposed
+        self.latencies = []
+        self.applied = 0
+
+    def apply(self, entries):
+        time.sleep(self.cost * len(entries))
+        now = time.perf_counter()
+        for _, idx, _ in entries:
+            t = self.proposed.pop(idx, None)
+            if t is not None:
+                self.latencies.append(now - t)
+        self.applied += len(entries)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def run(mode, seconds, apply_us, heartbeat, batch=64):
+    proposed = {}
+    machine = SlowMachine(apply_us, proposed)
+    recorder = HeartbeatRecorder()
+    node = RaftNode("a:1", [], inbox=queue.Queue(), router=recorder,
+                    state_machine=machine if mode == "pipelined" else None)
+    node.heartbeat_interval = heartbeat
+    if mode == "inline":
+        # Sin etapa de aplicación tampoco hay contrapresión
+        node.applier.max_pending = float("inf")
+    node.fsm.state = "leader"
+    node.become_leader()
+    inline_applied = node.commit_index
+
+    stop = threading.Event()
+    rejected = [0]
+
+    def proposer():
+        while not stop.is_set():
+            idx = node.propose_batch([f"move m{i} p{i % 50} piedra" for i in range(batch)])
+            if idx is None:
+                rejected[0] += 1
+            else:
+                proposed[idx] = time.perf_counter()
+
+    thread = threading.Thread(target=proposer, daemon=True)
+    start = time.perf_counter()
+    thread.start()
+    while time.perf_counter() - start < seconds:
+        node.fire()
+        if mode == "inline" and node.commit_index > inline_applied:
+            commit_index = node.commit_index
+            machine.apply([node.journal[i] for i in range(inline_applied, commit_index)])
+            inline_applied = commit_index
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join()
+    node.applier.stop()
+
+    gaps = [b - a for a, b in zip(recorder.times, recorder.times[1:])]
+    return {
+        "mode": mode,
+        "applied_per_sec": machine.applied / elapsed,
+        "heartbeat_p99_ms": percentile(gaps, 0.99) * 1000,
+        "heartbeat_max_ms": max(gaps, default=0.0) * 1000,
+        "apply_p50_ms": percentile(machine.latencies, 0.5) * 1000,
+        "apply_p99_ms": percentile(machine.latencies, 0.99) * 1000,
+        "rejected": rejected[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--apply-us", type=float, default=50.0, help="coste de aplicar una entrada")
+    parser.add_argument("--heartbeat-ms", type=float, default=50.0)
+    parser.add_argument("--queue", type=int, default=1024, help="raft.apply_queue")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    get_config().setdefault("raft", {})["apply_queue"] = args.queue
+    print(f"heartbeat cada {args.heartbeat_ms:.0f} ms, aplicación {args.apply_us:.0f} us/entrada")
+    for mode in ("inline", "pipelined"):
+        r = run(mode, args.seconds, args.apply_us, args.heartbeat_ms / 1000)
+        print(f"{r['mode']:>10}: {r['applied_per_sec']:8.0f} aplicadas/s  "
+              f"hueco entre heartbeats p99 {r['heartbeat_p99_ms']:7.1f} ms  máx {r['heartbeat_max_ms']:7.1f} ms  "
+              f"commit->aplicación p50 {r['apply_p50_ms']:7.1f} ms  p99 {r['apply_p99_ms']:7.1f} ms  "
+              f"propuestas rechazadas {r['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
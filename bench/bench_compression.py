@@ -0,0 +1,90 @@
+"""
+Benchmark de compresión por lotes del journal y de la replicación.
+
+Genera un log de partidas repetitivo (mismas acciones, jugadores y jugadas)
+y lo escribe en un FileJournal por lotes con cada codec. Informa del ratio
+de compresión (bytes de comandos / bytes en disco), entradas por segundo y
+segundos de CPU por MB de comandos.
+
+Uso: python -m bench.bench_compression [--entries N] [--batch 1,16,64,256]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from raft.commands import encode_command
+from raft.compression import BatchCodec, train_dictionary
+from raft.journal import FileJournal
+
+MOVES = ("piedra", "papel", "tijeras")
+
+
+def game_log(n, players=200, seed=1):
+    rnd = random.Random(seed)
+    entries = []
+    for i in range(n):
+        match = f"m{i // 6}"
+        if i % 6 == 5:
+            line = f"result {match} p{rnd.randrange(players)} p{rnd.randrange(players)} p{rnd.randrange(players)}"
+        else:
+            line = f"move {match} p{rnd.randrange(players)} {rnd.choice(MOVES)}"
+        entries.append((encode_command(line), i + 2, 1))
+    return entries
+
+
+def run(name, codec, entries, batch, path):
+    journal = FileJournal(path, codec)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for i in range(0, len(entries), batch):
+        chunk = entries[i:i + batch]
+        if codec is None:
+            for entry in chunk:
+                journal.add(*entry)
+        else:
+            journal.addBatch(chunk)
+    journal.flush()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    on_disk = journal._currentOffset
+    journal._destroy()
+    raw = sum(len(c) for c, _, _ in entries)
+    return {
+        "codec": name,
+        "batch": batch,
+        "ratio": raw / on_disk,
+        "entries_per_sec": len(entries) / wall,
+        "cpu_sec_per_mb": cpu / (raw / 2 ** 20),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--batch", default="1,16,64,256")
+    args = parser.parse_args()
+
+    entries = game_log(args.entries)
+    zdict = train_dictionary(c for c, _, _ in game_log(5000, seed=2))
+    codecs = [
+        ("raw", None),
+        ("zlib", BatchCodec("zlib")),
+        ("zlib+dict", BatchCodec("zlib", zdict=zdict)),
+        ("lzma", BatchCodec("lzma")),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for batch in (int(b) for b in args.batch.split(",")):
+            for name, codec in codecs:
+                if codec is None and batch != 1:
+                    continue
+                path = os.path.join(tmp, f"{name}-{batch}.journal")
+                r = run(name, codec, entries, batch, path)
+                print(f"{r['codec']:>10} lote {r['batch']:>4}: ratio {r['ratio']:5.2f}  "
+                      f"{r['entries_per_sec']:10.0f} entradas/s  "
+                      f"{r['cpu_sec_per_mb']:.3f} s CPU/MB")
+
+
+if __name__ == "__main__":
+    main()
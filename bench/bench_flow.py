@@ -0,0 +1,164 @@
+"""
+Benchmark de control de flujo: rendimiento del líder con un follower lento.
+
+Un líder y cuatro followers (mayoría de tres) conectados por TCP local con
+buffers pequeños. Los followers llevan la cuenta de su log, confirman cada
+AppendBatch (o lo rechazan con una pista si les falta algo) y uno de ellos
+tarda --slow-ms en procesar cada trama. El líder propone lotes sin pausa
+y atiende los acks entre propuesta y propuesta.
+
+  blocking  envío bloqueante a cada socket, sin ventana (como antes)
+  flow      Peer con cola propia que descarta al llenarse + ventana de
+            max_inflight AppendBatch por follower y sondeo de los atrasados
+
+Uso: python -m bench.bench_flow [--seconds S] [--slow-ms MS] [--entry-bytes B]
+"""
+import argparse
+import logging
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+
+from config import get_config
+from raft.compression import BatchCodec
+from raft.raft import RaftNode
+from raft.server import Peer, encode_frame, read_frames, send_frame
+
+FOLLOWERS = ["f1:1", "f2:2", "f3:3", "f4:4"]
+BUFFER = 64 * 1024
+
+
+def follower(listener, name, inbox, delay):
+    conn, _ = listener.accept()
+    listener.close()
+    codec = BatchCodec(None)
+    length = 1
+    try:
+        for msg in read_frames(conn):
+            if delay:
+                time.sleep(delay)
+            parts = msg.split()
+            if parts[0] != "AppendBatch":
+                continue
+            term, prev_idx = parts[1], int(parts[3])
+            if prev_idx > length:
+                inbox.put((name, f"AppendBatchAck {term} {name} {length} 0"))
+                continue
+            # Como RaftNode: un lote repetido no acorta el log
+            length = max(length, prev_idx + len(codec.decode(msg.payload)))
+            inbox.put((name, f"AppendBatchAck {term} {name} {length} 1"))
+    except OSError:
+        return  # el líder ha cerrado la conexión al terminar
+
+
+class BlockingRouter:
+    def __init__(self, socks):
+        self.socks = socks
+
+    def send(self, group, msg, payload=b'', addr=None):
+        prefix = encode_frame(msg, payload)
+        for name in ([addr] if addr in self.socks else self.socks):
+            send_frame(self.socks[name], prefix, payload)
+
+
+class FlowRouter:
+    def __init__(self, socks):
+        self.peers = {name: Peer(name, sock) for name, sock in socks.items()}
+
+    def send(self, group, msg, payload=b'', addr=None):
+        prefix = encode_frame(msg, payload)
+        for name in ([addr] if addr in self.peers else self.peers):
+            self.peers[name].send(prefix, payload)
+
+
+def connect(slow, slow_delay, inbox):
+    socks = {}
+    for name in FOLLOWERS:
+        listener = socket.socket()
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, BUFFER)
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(1)
+        delay = slow_delay if name == slow else 0
+        threading.Thread(target=follower, args=(listener, name, inbox, delay), daemon=True).start()
+        s = socket.socket()
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, BUFFER)
+        s.connect(listener.getsockname())
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        socks[name] = s
+    return socks
+
+
+def run(mode, seconds, slow, slow_delay, entry_bytes, journal_file, batch=64):
+    inbox = queue.Queue()
+    socks = connect(slow, slow_delay, inbox)
+    router = FlowRouter(socks) if mode == "flow" else BlockingRouter(socks)
+    node = RaftNode("leader:0", FOLLOWERS, journal_file, inbox=inbox, router=router)
+    node.heartbeat_interval = 0.05
+    if mode == "blocking":
+        node.max_inflight = 1 << 30
+        node.probing.clear()
+    node.fsm.state = "leader"
+    node.become_leader()
+    if mode == "blocking":
+        node.probing.clear()
+    first = node.commit_index
+    command = "x" * entry_bytes
+
+    # Reloj de pared: en modo bloqueante una sola llamada puede no volver hasta el final
+    stop = threading.Event()
+    threading.Timer(seconds, stop.set).start()
+    start = time.perf_counter()
+    while not stop.is_set():
+        node.propose_batch([f"move m p {command}"] * batch)
+        while not inbox.empty() and not stop.is_set():
+            node.fire()
+        node.fire()
+    elapsed = time.perf_counter() - start
+    committed = node.commit_index - first
+    healthy = [node.match_index.get(f, 0) for f in FOLLOWERS if f != slow]
+    lagging = node.match_index.get(slow, 0) if slow else None
+    dropped = router.peers[slow].dropped if mode == "flow" and slow else 0
+    node.applier.stop()
+    for s in socks.values():
+        s.close()
+    node.journal._destroy()
+    return {
+        "mode": mode,
+        "commits_per_sec": committed / elapsed,
+        "mb_per_sec": committed * (entry_bytes + 40) / elapsed / 2 ** 20,
+        "healthy_match": min(healthy),
+        "slow_match": lagging,
+        "journal": len(node.journal),
+        "dropped": dropped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--slow-ms", type=float, default=20.0)
+    parser.add_argument("--entry-bytes", type=int, default=256)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    get_config().setdefault("raft", {})["apply_queue"] = 1 << 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("blocking", "flow"):
+            for slow in (None, FOLLOWERS[-1]):
+                r = run(mode, args.seconds, slow, args.slow_ms / 1000, args.entry_bytes,
+                        os.path.join(tmp, f"{mode}-{slow}"))
+                label = f"{mode}, {'un follower lento' if slow else 'todos sanos'}"
+                line = (f"{label:<30} {r['commits_per_sec']:9.0f} entradas/s  {r['mb_per_sec']:6.1f} MB/s  "
+                        f"sanos en {r['healthy_match']}/{r['journal']}")
+                if slow:
+                    line += f"  lento en {r['slow_match']}/{r['journal']}"
+                if slow and mode == "flow":
+                    line += f", {r['dropped']} tramas descartadas"
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
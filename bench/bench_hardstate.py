@@ -0,0 +1,62 @@
+"""
+Benchmark de escritura del estado duro de Raft.
+
+Compara MetaStorer.storeMeta (pickle, fichero .tmp y rename, sin fsync),
+la misma ruta con fsync (lo que haría falta para que fuese durable) y
+HardStateStorer (slot fijo en mmap con un solo msync).
+
+Uso: python -m bench.bench_hardstate [--writes N]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from raft.journal import HardStateStorer, MetaStorer
+from raft.pickle import dumps
+
+
+class SyncedMetaStorer(MetaStorer):
+    def storeMeta(self, meta):
+        temp_path = self._path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(dumps(meta))
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.move(temp_path, self._path)
+
+
+def measure(store, writes):
+    latencies = []
+    for i in range(writes):
+        t0 = time.perf_counter()
+        store(i + 1, "10.0.0.1:5000" if i % 2 else None, i)
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+    return statistics.median(latencies) * 1e6, latencies[int(len(latencies) * 0.99)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        meta = MetaStorer(os.path.join(tmp, "journal.meta"))
+        synced = SyncedMetaStorer(os.path.join(tmp, "synced.meta"))
+        hard_state = HardStateStorer(os.path.join(tmp, "journal.state"))
+        cases = [
+            ("pickle+rename", lambda t, v, c: meta.storeMeta({"term": t, "votedFor": v, "raftCommitIndex": c})),
+            ("pickle+fsync+rename", lambda t, v, c: synced.storeMeta({"term": t, "votedFor": v, "raftCommitIndex": c})),
+            ("hardstate mmap+msync", hard_state.store),
+        ]
+        for name, store in cases:
+            p50, p99 = measure(store, args.writes)
+            print(f"{name:>22}: p50 {p50:8.1f} us  p99 {p99:8.1f} us")
+        hard_state._destroy()
+
+
+if __name__ == "__main__":
+    main()
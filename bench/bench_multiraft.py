@@ -0,0 +1,117 @@
+"""
+Benchmark de Multi-Raft: comandos comprometidos por segundo según el número de grupos.
+
+Tres MultiRaft en el mismo proceso se comunican por colas en memoria. Cada
+log es serie: un grupo compromete como mucho un lote por ronda de
+replicación (--rtt simula la ida y vuelta de red + fsync), así que el
+rendimiento agregado crece con los grupos hasta saturar la CPU. Cada
+grupo escribe en su propio FileJournal. Se cuenta lo que avanza el commit
+index de cada grupo, no lo propuesto.
+
+Uso: python -m bench.bench_multiraft [--groups 1,2,4,8,16] [--rtt 0.002]
+"""
+import argparse
+import logging
+import os
+import queue
+import tempfile
+import time
+
+from config import get_config
+from raft.multi import MultiRaft
+from raft.server import Message
+
+NODES = ["a:1", "b:2", "c:3"]
+
+
+def build_cluster(num_groups, tmp):
+    inboxes = {addr: queue.Queue() for addr in NODES}
+    sent = {"messages": 0}
+
+    def sender(me):
+        def send(msg, payload=b''):
+            sent["messages"] += 1
+            for addr, inbox in inboxes.items():
+                if addr != me:
+                    inbox.put((me, Message(msg, bytes(payload))))
+        return send
+
+    def direct_sender(me):
+        def send_to(addr, msg, payload=b''):
+            sent["messages"] += 1
+            inboxes[addr].put((me, Message(msg, bytes(payload))))
+        return send_to
+
+    cluster = [
+        MultiRaft(addr, [o for o in NODES if o != addr], num_groups,
+                  journal_prefix=os.path.join(tmp, f"{addr.replace(':', '_')}-{num_groups}"),
+                  inbox=inboxes[addr], send=sender(addr), send_to=direct_sender(addr))
+        for addr in NODES
+    ]
+    return cluster, sent
+
+
+def commit_indexes(cluster):
+    # Por grupo, el mayor commit index del clúster (el del líder, aunque cambie)
+    return [max(mr.groups[g].commit_index for mr in cluster) for g in range(len(cluster[0].groups))]
+
+
+def run(num_groups, rtt, seconds, batch, tmp):
+    cluster, sent = build_cluster(num_groups, tmp)
+    deadline = time.perf_counter() + 5
+    while time.perf_counter() < deadline:
+        for mr in cluster:
+            mr.fire()
+        if sum(len(mr.leaders()) for mr in cluster) == num_groups:
+            break
+    leaders = [len(mr.leaders()) for mr in cluster]
+
+    first = commit_indexes(cluster)
+    rounds = 0
+    sent["messages"] = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        # Cada líder compromete un lote por ronda en su propio log
+        for mr in cluster:
+            for node in mr.groups:
+                if node.is_leader():
+                    node.propose_batch([f"move m{node.group} p{i} piedra" for i in range(batch)])
+        for mr in cluster:
+            mr.fire()
+        rounds += 1
+        time.sleep(rtt)
+    elapsed = time.perf_counter() - start
+    committed = sum(end - begin for begin, end in zip(first, commit_indexes(cluster)))
+    for mr in cluster:
+        for node in mr.groups:
+            node.journal._destroy()
+    return {
+        "groups": num_groups,
+        "commits_per_sec": committed / elapsed,
+        "leaders_per_node": leaders,
+        "messages_per_round": sent["messages"] / max(rounds, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--groups", default="1,2,4,8,16")
+    parser.add_argument("--rtt", type=float, default=0.002)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    raft_config = get_config().setdefault("raft", {})
+    raft_config.update(election_timeout_min=0.05, election_timeout_max=0.15, heartbeat_interval=0.01)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for g in (int(x) for x in args.groups.split(",")):
+            r = run(g, args.rtt, args.seconds, args.batch, tmp)
+            print(f"{r['groups']:>3} grupos: {r['commits_per_sec']:10.0f} comprometidos/s  "
+                  f"líderes por nodo {r['leaders_per_node']}  "
+                  f"mensajes por ronda {r['messages_per_round']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
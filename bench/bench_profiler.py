@@ -0,0 +1,63 @@
+"""
+Benchmark del sobrecoste del perfilador por muestreo.
+
+Mide cuántas veces por segundo se ejecuta FSM.fire con un hilo lector de
+fondo (como handle_client), sin perfilador y con el perfilador a varios
+intervalos. Compara la caída de rendimiento observada con el sobrecoste
+que el propio perfilador mide y limita.
+
+Uso: python -m bench.bench_profiler [--seconds S]
+"""
+import argparse
+import queue
+import threading
+import time
+
+from fsm import FSM
+from profiler import SamplingProfiler
+
+
+def fires_per_sec(seconds):
+    inbox = queue.Queue()
+    stop = threading.Event()
+
+    def reader():
+        # Simula un hilo handle_client que encola mensajes
+        while not stop.is_set():
+            inbox.put(("peer", "AppendEntries 1 a:1 1"))
+            time.sleep(0.0005)
+
+    fsm = FSM("bench", "follower", [
+        ("follower", lambda: inbox.qsize() > 1000, "follower", lambda: inbox.queue.clear()),
+        ("follower", lambda: not inbox.empty(), "follower", inbox.get),
+        ("follower", lambda: True, "follower", lambda: None),
+    ])
+    threading.Thread(target=reader, daemon=True).start()
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fsm.fire()
+        count += 1
+    stop.set()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    baseline = fires_per_sec(args.seconds)
+    print(f"{'sin perfilador':>16}: {baseline:10.0f} fire/s")
+    for interval_ms in (1, 5, 10):
+        profiler = SamplingProfiler(interval=interval_ms / 1000)
+        profiler.start()
+        rate = fires_per_sec(args.seconds)
+        profiler.stop()
+        print(f"{f'muestreo {interval_ms} ms':>16}: {rate:10.0f} fire/s  "
+              f"caída {1 - rate / baseline:6.2%}  sobrecoste medido {profiler.overhead():.2%}  "
+              f"intervalo final {profiler.interval * 1000:.1f} ms  {profiler.samples} muestras")
+
+
+if __name__ == "__main__":
+    main()
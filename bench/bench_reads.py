@@ -0,0 +1,131 @@
+"""
+Benchmark de lecturas linealizables: journal vs ReadIndex vs lease.
+
+Un RaftNode líder y dos followers simulados unidos por sockets locales.
+Los followers confirman cada heartbeat y cada AppendBatch; el líder corre
+su bucle (fire()) y aplica con su ApplyWorker, así que cada lectura espera
+a que el índice aplicado real alcance su read index. Cada cliente lanza
+lecturas secuenciales:
+
+  log         cada lectura es un comando (submit) que se añade al journal,
+              se replica, se compromete y se responde al aplicarlo
+  read_index  RaftNode.read() con una ronda de heartbeats por lote de lecturas
+  lease       RaftNode.read() con read_mode "lease": sin red mientras dure
+
+Uso: python -m bench.bench_reads [--clients N] [--seconds S]
+"""
+import argparse
+import logging
+import os
+import queue
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+from config import get_config
+from raft.compression import BatchCodec
+from raft.raft import RaftNode
+from raft.server import encode_frame, read_frames, send_frame
+
+FOLLOWERS = ("b:2", "c:3")
+
+
+def follower(sock, name, inbox):
+    codec = BatchCodec(None)
+    try:
+        for msg in read_frames(sock):
+            parts = msg.split()
+            if parts[0] == "AppendEntries":
+                inbox.put((name, f"AppendEntriesAck {parts[1]} {name} {parts[3]}"))
+            elif parts[0] == "AppendBatch":
+                last = int(parts[3]) + len(codec.decode(msg.payload))
+                inbox.put((name, f"AppendBatchAck {parts[1]} {name} {last} 1"))
+    except OSError:
+        return  # el líder ha cerrado la conexión al terminar
+
+
+class Links:
+    def __init__(self, socks):
+        self.socks = socks
+
+    def send(self, group, msg, payload=b'', addr=None):
+        prefix = encode_frame(msg, payload)
+        for name in ([addr] if addr in self.socks else self.socks):
+            send_frame(self.socks[name], prefix, payload)
+
+
+def run(mode, clients, seconds, journal_path):
+    get_config().setdefault("raft", {})["read_mode"] = "lease" if mode == "lease" else "read_index"
+    inbox = queue.Queue()
+    socks = {}
+    for name in FOLLOWERS:
+        a, b = socket.socketpair()
+        threading.Thread(target=follower, args=(b, name, inbox), daemon=True).start()
+        socks[name] = a
+    node = RaftNode("a:1", list(FOLLOWERS), journal_path if mode == "log" else None,
+                    inbox=inbox, router=Links(socks))
+    node.fsm.state = "leader"
+    node.become_leader()
+
+    stop = threading.Event()
+    latencies = []
+
+    def client(name):
+        done = threading.Event()
+        seq = 0
+        while not stop.is_set():
+            done.clear()
+            seq += 1
+            t0 = time.perf_counter()
+            if mode == "log":
+                accepted = node.submit(name, seq, "read score", lambda response: done.set())
+            else:
+                accepted = True
+                node.read(lambda idx: idx is not None and done.set())
+            if not accepted or not done.wait(1):
+                continue
+            latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=client, args=(f"client-{i}",), daemon=True) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    while time.perf_counter() - start < seconds:
+        node.fire()
+        time.sleep(0.0001)
+    elapsed = time.perf_counter() - start
+    completed = len(latencies)
+    stop.set()
+    for callback in node.reads.fail_all():
+        callback(None)
+    node.applier.stop()
+    for s in socks.values():
+        s.close()
+    node.journal._destroy()
+
+    latencies = sorted(latencies[:completed])
+    return {
+        "mode": mode,
+        "reads_per_sec": completed / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("log", "read_index", "lease"):
+            r = run(mode, args.clients, args.seconds, os.path.join(tmp, f"{mode}.journal"))
+            print(f"{r['mode']:>10}: {r['reads_per_sec']:10.0f} reads/s  "
+                  f"p50 {r['p50_ms']:.3f} ms  p99 {r['p99_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark de sesiones de cliente: memoria de la tabla y aciertos en tormentas de reintentos.
+
+Memoria: bytes por sesión (tracemalloc) y tamaño de la instantánea con
+100k sesiones.
+
+Tormenta de reintentos: un líder de un solo nodo con aplicación lenta
+(--apply-us por entrada) y clientes que reintentan su comando cada
+--retry-ms hasta recibir la respuesta, algo más corto que la latencia de
+aplicación. Sin sesiones cada reintento sería una entrada más en el
+journal y otra aplicación; con ellas se une a la entrada pendiente o se
+responde desde la tabla. Una fracción --failover de los reintentos llega
+como tras un cambio de líder, sin la espera registrada en el líder
+anterior: esos sí se añaden al journal y se descartan al aplicarlos.
+Con --max-sessions menor que el número de
+clientes se ve el efecto del desalojo LRU.
+
+Uso: python -m bench.bench_sessions [--clients N] [--seconds S] [--retry-ms MS]
+"""
+import argparse
+import logging
+import queue
+import random
+import threading
+import time
+import tracemalloc
+
+from config import get_config
+from raft.commands import decode_session
+from raft.pickle import dumps
+from raft.raft import RaftNode
+from raft.sessions import SessionTable
+
+
+def session_memory(n=100000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    table = SessionTable(n)
+    for i in range(n):
+        table.record(f"client-{i:08d}", i, f"ok {i}")
+    used = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+    return used, len(dumps(table.snapshot()))
+
+
+class Transport:
+    def send(self, group, msg, payload=b''):
+        pass
+
+
+class CountingMachine:
+    def __init__(self, apply_us):
+        self.cost = apply_us / 1e6
+        self.applied = set()
+        self.applies = 0
+        self.double_applies = 0
+
+    def apply(self, entries):
+        time.sleep(self.cost * len(entries))
+        responses = []
+        for command, idx, _ in entries:
+            session = decode_session(command)
+            if session is None:
+                responses.append(None)
+                continue
+            self.applies += 1
+            if session in self.applied:
+                self.double_applies += 1
+            self.applied.add(session)
+            responses.append(f"ok {idx}")
+        return responses
+
+
+def retry_storm(clients, seconds, retry, apply_us, max_sessions, failover):
+    get_config().setdefault("raft", {})["max_sessions"] = max_sessions
+    machine = CountingMachine(apply_us)
+    node = RaftNode("a:1", [], inbox=queue.Queue(), router=Transport(), state_machine=machine)
+    node.fsm.state = "leader"
+    node.become_leader()
+    first_entry = len(node.journal)
+    stop = threading.Event()
+    counts = []
+
+    def client(name):
+        seq = submissions = completed = 0
+        while not stop.is_set():
+            seq += 1
+            done = threading.Event()
+            retrying = False
+            while not stop.is_set():
+                if retrying and random.random() < failover:
+                    node.applier.waiters.pop((name, seq), None)
+                submissions += 1
+                node.submit(name, seq, f"move m{seq} {name} piedra", lambda response: done.set())
+                if done.wait(retry):
+                    completed += 1
+                    break
+                retrying = True
+        counts.append((submissions, completed))
+
+    threads = [threading.Thread(target=client, args=(f"c{i}",), daemon=True) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    while time.perf_counter() - start < seconds:
+        node.fire()
+        time.sleep(0.001)
+    stop.set()
+    for t in threads:
+        t.join()
+    node.applier.stop()
+
+    entries = len(node.journal) - first_entry
+    unique = len(machine.applied)
+    submissions = sum(s for s, _ in counts)
+    retries = submissions - unique
+    return {
+        "submissions": submissions,
+        "unique": unique,
+        "completed": sum(c for _, c in counts),
+        "journal_entries": entries,
+        "applies": machine.applies,
+        "double_applies": machine.double_applies,
+        "apply_hits": node.applier.sessions.hits,
+        "evictions": node.applier.sessions.evictions,
+        "hit_rate": 1 - (machine.applies - unique) / retries if retries else 1.0,
+        "journal_saved": 1 - (entries - unique) / retries if retries else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--retry-ms", type=float, default=5.0)
+    parser.add_argument("--apply-us", type=float, default=300.0)
+    parser.add_argument("--failover", type=float, default=0.2)
+    parser.add_argument("--max-sessions", type=int, nargs="+", default=[10000, 8])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    used, snapshot = session_memory()
+    print(f"100k sesiones: {used / 2 ** 20:.1f} MiB en memoria ({used / 100000:.0f} B/sesión), "
+          f"instantánea {snapshot / 2 ** 20:.1f} MiB")
+
+    for max_sessions in args.max_sessions:
+        r = retry_storm(args.clients, args.seconds, args.retry_ms / 1000, args.apply_us, max_sessions, args.failover)
+        print(f"max_sessions {max_sessions:>6}: {r['submissions']} envíos, {r['unique']} comandos distintos, "
+              f"{r['completed']} respondidos; journal +{r['journal_entries']} entradas, "
+              f"{r['applies']} aplicaciones ({r['double_applies']} repetidas, {r['apply_hits']} desde la tabla, {r['evictions']} desalojos); "
+              f"reintentos sin reaplicar {r['hit_rate']:.1%}, sin entrada nueva {r['journal_saved']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
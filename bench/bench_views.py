@@ -0,0 +1,133 @@
+"""
+Benchmark de las vistas del juego: consultas con 1M de jugadores y reconstrucción tras reiniciar.
+
+Se aplican partidas de dos jugadores (cada jugador juega --matches
+partidas) por lotes, como lo haría el hilo de aplicación, y se mide:
+
+  - aplicación incremental (entradas/s), que es también lo que costaría
+    responder "top" reescaneando el journal completo;
+  - latencia de top 10, posición de un jugador, página profunda de la
+    clasificación, partida por id e historial de un jugador;
+  - reconstrucción desde instantánea + cola frente a reaplicar todo.
+
+Uso: python -m bench.bench_views [--players N] [--matches M] [--tail T]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from game.views import GameViews
+from raft.apply import ApplyWorker
+from raft.commands import encode_command
+from raft.journal import MetaStorer
+
+CHOICES = ("piedra", "papel", "tijeras")
+
+
+def moves(players, matches, seed=1):
+    """
+    Entradas (comando, índice, término): cada ronda empareja a todos los jugadores al azar.
+    """
+    rng = random.Random(seed)
+    order = list(range(players))
+    idx = 0
+    for r in range(matches):
+        rng.shuffle(order)
+        for i in range(0, players - 1, 2):
+            match = f"m{r}-{i // 2}"
+            for p in (order[i], order[i + 1]):
+                idx += 1
+                yield encode_command(f"move {match} p{p} {rng.choice(CHOICES)}"), idx, 1
+
+
+def apply_all(views, entries, batch=256):
+    """
+    Aplica por lotes y devuelve el tiempo pasado en apply() (sin generar los comandos).
+    """
+    elapsed = 0.0
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) == batch:
+            t0 = time.perf_counter()
+            views.apply(chunk)
+            elapsed += time.perf_counter() - t0
+            chunk = []
+    if chunk:
+        t0 = time.perf_counter()
+        views.apply(chunk)
+        elapsed += time.perf_counter() - t0
+    return elapsed
+
+
+def latency(fn, args, repeat=2000):
+    samples = []
+    for i in range(repeat):
+        arg = args[i % len(args)]
+        t0 = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def queries(views, rng, players, matches):
+    """
+    (nombre, consulta, argumentos) de las consultas medidas, con jugadores y partidas al azar.
+    """
+    names = [f"p{rng.randrange(players)}" for _ in range(1000)]
+    match_ids = [f"m{rng.randrange(matches)}-{rng.randrange(players // 2)}" for _ in range(1000)]
+    return [
+        ("top 10", lambda _: views.top(10), [None]),
+        ("posición de un jugador", views.player, names),
+        ("página en la posición n/2", lambda _: views.board.page(players // 2, 10), [None]),
+        ("partida por id", views.match, match_ids),
+        ("historial de un jugador", views.player_history, names),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--players", type=int, default=1000000)
+    parser.add_argument("--matches", type=int, default=2, help="partidas por jugador")
+    parser.add_argument("--tail", type=int, default=10000, help="entradas tras la instantánea")
+    args = parser.parse_args()
+
+    total = args.players // 2 * 2 * args.matches
+    views = GameViews()
+    build = apply_all(views, moves(args.players, args.matches))
+    print(f"{len(views.players)} jugadores, {len(views.results)} partidas: "
+          f"{total / build:,.0f} entradas/s aplicadas ({build:.1f} s para todo el journal)")
+
+    rng = random.Random(2)
+    for name, fn, fn_args in queries(views, rng, args.players, args.matches):
+        p50, p99 = latency(fn, fn_args)
+        print(f"  {name:<28} p50 {p50:8.1f} us  p99 {p99:8.1f} us")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storer = MetaStorer(os.path.join(tmp, "views.snapshot"))
+        applier = ApplyWorker(views, last_applied=total, snapshot_storer=storer)
+        applier.last_snapshot = 0
+        t0 = time.perf_counter()
+        applier.save_snapshot()
+        save = time.perf_counter() - t0
+        size = os.path.getsize(storer.getPath())
+        del views, applier
+
+        t0 = time.perf_counter()
+        restored = GameViews()
+        ApplyWorker(restored, snapshot_storer=storer).load_snapshot(total)
+        load = time.perf_counter() - t0
+        tail = [(encode_command(f"move t{i // 2} p{rng.randrange(args.players)} {rng.choice(CHOICES)}"),
+                 total + i + 1, 1) for i in range(args.tail)]
+        replay = apply_all(restored, tail)
+    print(f"instantánea {size / 2 ** 20:.0f} MiB guardada en {save:.1f} s; reinicio: carga {load:.1f} s "
+          f"+ cola de {args.tail} entradas {replay:.2f} s = {load + replay:.1f} s "
+          f"(reaplicar el journal completo: {build:.1f} s)")
+    print(f"  tras reiniciar: {restored.top(3)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Casos de la suite de benchmarks (python -m bench).
+
+Cada caso devuelve (valor, unidad, mayor_es_mejor). Los micro casos usan
+measure(); los de sistema reutilizan los benchmarks individuales con
+parámetros cortos.
+"""
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from fsm import FSM
+from raft.commands import encode_command, decode_command
+from raft.journal import MemoryJournal, FileJournal, HardStateStorer
+from raft.pickle import dumps, loads
+from raft.server import message_queue, handle_client, encode_frame, send_frame
+
+CASES = {}
+
+ENTRIES = 10000
+
+
+def case(name):
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def measure(fn, repeat=5, min_time=0.2):
+    """
+    Operaciones por segundo de fn (mejor de repeat rondas de al menos min_time).
+    """
+    best = 0.0
+    for _ in range(repeat):
+        count = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            count += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, count / elapsed)
+    return best
+
+
+def entries(n=ENTRIES):
+    return [(encode_command(f"move m{i // 6} p{i % 50} piedra"), i + 1, 1) for i in range(n)]
+
+
+# ---------- fsm ----------
+
+@case("fsm.fire")
+def fsm_fire():
+    fsm = FSM("bench", "a", [
+        ("a", lambda: False, "b", lambda: None),
+        ("a", lambda: False, "b", lambda: None),
+        ("a", lambda: True, "a", lambda: None),
+        ("b", lambda: True, "a", lambda: None),
+    ])
+    return measure(fsm.fire), "ops/s", True
+
+
+# ---------- journal ----------
+
+def journal_add(journal, data):
+    for entry in data:
+        journal.add(*entry)
+
+
+@case("journal.memory.add")
+def memory_add():
+    data = entries()
+    rate = measure(lambda: journal_add(MemoryJournal(), data))
+    return rate * len(data), "entries/s", True
+
+
+@case("journal.memory.truncate")
+def memory_truncate():
+    data = entries()
+
+    def run():
+        journal = MemoryJournal()
+        journal._journal = list(data)
+        journal.deleteEntriesFrom(len(data) // 2)
+    return measure(run), "ops/s", True
+
+
+@case("journal.file.add")
+def file_add():
+    data = entries()
+    with tempfile.TemporaryDirectory() as tmp:
+        counter = iter(range(1 << 30))
+
+        def run():
+            journal = FileJournal(os.path.join(tmp, f"add-{next(counter)}"))
+            journal_add(journal, data)
+            journal._destroy()
+        return measure(run, min_time=0.5) * len(data), "entries/s", True
+
+
+@case("journal.file.add_batch")
+def file_add_batch():
+    data = entries()
+    with tempfile.TemporaryDirectory() as tmp:
+        counter = iter(range(1 << 30))
+
+        def run():
+            journal = FileJournal(os.path.join(tmp, f"batch-{next(counter)}"))
+            for i in range(0, len(data), 64):
+                journal.addBatch(data[i:i + 64])
+            journal._destroy()
+        return measure(run, min_time=0.5) * len(data), "entries/s", True
+
+
+def filled_journal(path, batch=False):
+    journal = FileJournal(path)
+    data = entries()
+    if batch:
+        for i in range(0, len(data), 64):
+            journal.addBatch(data[i:i + 64])
+    else:
+        journal_add(journal, data)
+    journal.flush()
+    return journal
+
+
+@case("journal.file.load")
+def file_load():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "load")
+        filled_journal(path)._destroy()
+
+        def run():
+            FileJournal(path)._destroy()
+        return measure(run, min_time=0.5) * ENTRIES, "entries/s", True
+
+
+@case("journal.file.truncate")
+def file_truncate():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = filled_journal(os.path.join(tmp, "truncate"), batch=True)
+        data = [journal[i] for i in range(len(journal))]
+
+        def run():
+            journal.deleteEntriesFrom(len(data) // 2)
+            for i in range(len(data) // 2, len(data), 64):
+                journal.addBatch(data[i:i + 64])
+        rate = measure(run, min_time=0.5)
+        journal._destroy()
+        return rate, "ops/s", True
+
+
+@case("journal.file.compact")
+def file_compact():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = filled_journal(os.path.join(tmp, "compact"), batch=True)
+        data = [journal[i] for i in range(len(journal))]
+
+        def run():
+            journal.deleteEntriesTo(len(data) // 2)
+            journal._rewrite(data)
+        rate = measure(run, min_time=0.5)
+        journal._destroy()
+        return rate, "ops/s", True
+
+
+@case("journal.hardstate.store")
+def hardstate_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        hard_state = HardStateStorer(os.path.join(tmp, "state"))
+        counter = iter(range(1, 1 << 30))
+        rate = measure(lambda: hard_state.store(next(counter), "10.0.0.1:5000", 1))
+        hard_state._destroy()
+        return 1e6 / rate, "us/op", False
+
+
+# ---------- codecs ----------
+
+@case("commands.encode")
+def commands_encode():
+    return measure(lambda: encode_command("move m1 p1 piedra")), "ops/s", True
+
+
+@case("commands.decode")
+def commands_decode():
+    data = encode_command("move m1 p1 piedra")
+    return measure(lambda: decode_command(data)), "ops/s", True
+
+
+META = {"raftCommitIndex": 12345, "term": 7, "votedFor": "10.0.0.1:5000",
+        "entries": entries(100)}
+
+
+@case("pickle.dumps")
+def pickle_dumps():
+    return measure(lambda: dumps(META)), "ops/s", True
+
+
+@case("pickle.loads")
+def pickle_loads():
+    data = dumps(META)
+    return measure(lambda: loads(data)), "ops/s", True
+
+
+@case("compression.zlib.ratio")
+def compression_ratio():
+    from raft.compression import BatchCodec
+    data = entries()
+    codec = BatchCodec("zlib")
+    raw = sum(len(c) for c, _, _ in data)
+    compressed = sum(len(codec.encode(data[i:i + 64])) for i in range(0, len(data), 64))
+    return raw / compressed, "x", True
+
+
+# ---------- transporte ----------
+
+@case("server.loopback")
+def server_loopback():
+    """
+    Mensajes por segundo desde send_frame hasta message_queue a través de handle_client.
+    """
+    a, b = socket.socketpair()
+    threading.Thread(target=handle_client, args=(b, "bench"), daemon=True).start()
+    prefix = encode_frame("AppendEntries 1 a:1 1")
+    n = 20000
+
+    def run():
+        for _ in range(n):
+            send_frame(a, prefix)
+        for _ in range(n):
+            message_queue.get()
+    rate = measure(run, repeat=3, min_time=0.5) * n
+    a.close()
+    return rate, "msgs/s", True
+
+
+@case("reads.read_index")
+def reads_read_index():
+    from bench.bench_reads import run
+    with tempfile.TemporaryDirectory() as tmp:
+        result = run("read_index", 4, 0.5, os.path.join(tmp, "reads"))
+    return result["reads_per_sec"], "reads/s", True
+
+
+@case("transport.zerocopy")
+def transport_zerocopy():
+    from bench.bench_transport import connect_followers, released, send_zerocopy
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = FileJournal(os.path.join(tmp, "transport"))
+        command = os.urandom(4096)
+        for b in range(64):
+            journal.addBatch([(command, b * 64 + i + 1, 1) for i in range(64)])
+        total = sum(len(view) for _, view in released(journal.iterBatches(0))) * 2
+        conns = connect_followers()
+        start = time.perf_counter()
+        send_zerocopy(conns, released(journal.iterBatches(0)))
+        elapsed = time.perf_counter() - start
+        for c in conns:
+            c.close()
+        journal._destroy()
+    return total / elapsed / 2 ** 20, "MB/s", True
+
+
+@case("apply.heartbeat_gap_p99")
+def apply_heartbeat_gap():
+    from bench.bench_apply import run
+    result = run("pipelined", 1.0, 50.0, 0.05)
+    return result["heartbeat_p99_ms"], "ms", False
+
+
+@case("sessions.record")
+def sessions_record():
+    from raft.sessions import SessionTable
+    table = SessionTable(10000)
+    counter = iter(range(1 << 62))
+
+    def run():
+        i = next(counter)
+        table.record(f"client-{i % 20000}", i, "ok")
+    return measure(run), "ops/s", True
+
+
+@case("views.rank")
+def views_rank():
+    from bench.bench_views import apply_all, moves
+    from game.views import GameViews
+    views = GameViews()
+    apply_all(views, moves(100000, 2))
+    players = iter(range(1 << 62))
+    return measure(lambda: views.player(f"p{next(players) % 100000}")), "ops/s", True
+
+
+@case("flow.slow_follower")
+def flow_slow_follower():
+    from bench.bench_flow import FOLLOWERS, run
+    with tempfile.TemporaryDirectory() as tmp:
+        result = run("flow", 1.0, FOLLOWERS[-1], 0.02, 256, os.path.join(tmp, "flow"))
+    return result["commits_per_sec"], "entries/s", True
@@ -0,0 +1,321 @@
+import itertools
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from raft.commands import decode_command
+
+POINTS_WIN = 3
+POINTS_DRAW = 1
+
+# Jugada -> jugada a la que gana
+BEATS = {"piedra": "tijeras", "papel": "piedra", "tijeras": "papel"}
+
+
+class Leaderboard:
+    """
+    Clasificación por puntos con consultas de posición en O(log n).
+
+    Un árbol de Fenwick indexado por puntuación cuenta cuántos jugadores
+    tiene cada una; la posición de un jugador es 1 + los que tienen más
+    puntos (empates comparten posición). Dentro de cada puntuación los
+    jugadores se guardan en el orden en que la alcanzaron, igual en todas
+    las réplicas, que es el orden de desempate al listar.
+    """
+
+    def __init__(self, size: int = 1024):
+        self._tree = [0] * (size + 1)
+        # puntuación -> {jugador: None}, en orden de llegada
+        self._buckets: Dict[int, Dict[str, None]] = {}
+        self.total = 0
+
+    def __len__(self):
+        return self.total
+
+    def _add(self, score: int, delta: int):
+        i = score + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _grow(self, score: int):
+        # Antes de tocar los cubos: _build cuenta a partir de ellos
+        if score + 1 < len(self._tree):
+            return
+        size = len(self._tree) - 1
+        while size <= score:
+            size *= 2
+        self._build(size)
+
+    def _build(self, size: int):
+        # Construcción en O(size) a partir de los cubos
+        tree = [0] * (size + 1)
+        for score, players in self._buckets.items():
+            tree[score + 1] += len(players)
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _count_upto(self, score: int) -> int:
+        """
+        Jugadores con puntuación <= score.
+        """
+        i = min(score + 1, len(self._tree) - 1)
+        count = 0
+        while i > 0:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+    def _kth(self, k: int) -> int:
+        """
+        Puntuación del k-ésimo jugador en orden ascendente (1 <= k <= total).
+        """
+        pos = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] < k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+    def insert(self, player: str, score: int):
+        self._grow(score)
+        self._buckets.setdefault(score, {})[player] = None
+        self._add(score, 1)
+        self.total += 1
+
+    def update(self, player: str, old: int, new: int):
+        if old == new:
+            return
+        self._grow(new)
+        bucket = self._buckets[old]
+        del bucket[player]
+        if not bucket:
+            del self._buckets[old]
+        self._add(old, -1)
+        self._buckets.setdefault(new, {})[player] = None
+        self._add(new, 1)
+
+    def rank(self, score: int) -> int:
+        return 1 + self.total - self._count_upto(score)
+
+    def page(self, start: int, count: int) -> List[Tuple[int, str, int]]:
+        """
+        (posición, jugador, puntos) de los count jugadores a partir de la posición start.
+        Cuesta O(log n) por puntuación distinta recorrida más lo listado, salvo
+        los jugadores que haya que saltar dentro de una misma puntuación.
+        """
+        result = []
+        above = start - 1
+        while len(result) < count and above < self.total:
+            # La puntuación del siguiente jugador por encima de los ya listados
+            score = self._kth(self.total - above)
+            players = self._buckets[score]
+            rank = self.rank(score)
+            skip = above - (rank - 1)
+            for player in itertools.islice(players, skip, skip + count - len(result)):
+                result.append((rank, player, score))
+            above = rank - 1 + len(players)
+        return result
+
+    def top(self, count: int) -> List[Tuple[int, str, int]]:
+        return self.page(1, count)
+
+    def snapshot(self) -> List[Tuple[int, List[str]]]:
+        return [(score, list(players)) for score, players in self._buckets.items()]
+
+    def restore(self, buckets: List[Tuple[int, List[str]]]):
+        self._buckets = {score: dict.fromkeys(players) for score, players in buckets}
+        self.total = sum(len(players) for players in self._buckets.values())
+        size = len(self._tree) - 1
+        top = max(self._buckets, default=0)
+        while size <= top:
+            size *= 2
+        self._build(size)
+
+
+class GameViews:
+    """
+    Máquina de estados del juego con vistas materializadas, mantenidas
+    incrementalmente al aplicar cada entrada comprometida:
+
+      players   jugador -> [puntos, victorias, empates, derrotas]
+      board     Leaderboard por puntos
+      matches   partida -> [(jugador, jugada, índice en el journal), ...]
+      results   partida -> ganador ("" si empate)
+      history   jugador -> partidas en las que ha jugado
+
+    Cada partida enfrenta a dos jugadores ("move <partida> <jugador> <jugada>");
+    se puntúa al llegar la segunda jugada. Los índices apuntan a la entrada
+    del journal con la jugada (journal[índice - 1]).
+
+    Se aplica desde el hilo de aplicación de Raft; las consultas pueden
+    llegar desde la shell o el socket de administración, por eso todo pasa
+    por self.lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.players: Dict[str, List[int]] = {}
+        self.board = Leaderboard()
+        self.matches: Dict[str, List[Tuple[str, str, int]]] = {}
+        self.results: Dict[str, str] = {}
+        self.history: Dict[str, List[str]] = {}
+
+    # ---------- Aplicación ----------
+
+    def apply(self, entries):
+        with self.lock:
+            return [self._apply_entry(command, idx) for command, idx, _ in entries]
+
+    def _apply_entry(self, command, idx):
+        try:
+            action, args = decode_command(command)
+        except ValueError:
+            return None  # NO_OP del líder
+        if action != "move":
+            return None
+        if len(args) != 3 or args[2] not in BEATS:
+            return "error jugada no válida"
+        match, player, choice = args
+        moves = self.matches.setdefault(match, [])
+        if match in self.results:
+            return "error partida terminada"
+        if any(p == player for p, _, _ in moves):
+            return "error jugada repetida"
+        moves.append((player, choice, idx))
+        self.history.setdefault(player, []).append(match)
+        if player not in self.players:
+            self.players[player] = [0, 0, 0, 0]
+            self.board.insert(player, 0)
+        if len(moves) < 2:
+            return "ok"
+        return self._score(match, moves)
+
+    def _score(self, match, moves):
+        (p1, c1, _), (p2, c2, _) = moves
+        if c1 == c2:
+            self.results[match] = ""
+            self._add(p1, POINTS_DRAW, 2)
+            self._add(p2, POINTS_DRAW, 2)
+            return "draw"
+        winner, loser = (p1, p2) if BEATS[c1] == c2 else (p2, p1)
+        self.results[match] = winner
+        self._add(winner, POINTS_WIN, 1)
+        self._add(loser, 0, 3)
+        return f"winner {winner}"
+
+    def _add(self, player, points, column):
+        stats = self.players[player]
+        old = stats[0]
+        stats[0] += points
+        stats[column] += 1
+        self.board.update(player, old, stats[0])
+
+    # ---------- Consultas ----------
+
+    def top(self, count: int = 10) -> List[Tuple[int, str, int]]:
+        with self.lock:
+            return self.board.top(count)
+
+    def player(self, player: str) -> Optional[Tuple[int, List[int]]]:
+        """
+        (posición, [puntos, victorias, empates, derrotas]) o None si no ha jugado.
+        """
+        with self.lock:
+            stats = self.players.get(player)
+            if stats is None:
+                return None
+            return self.board.rank(stats[0]), list(stats)
+
+    def match(self, match: str) -> Optional[Tuple[List[Tuple[str, str, int]], Optional[str]]]:
+        """
+        (jugadas con su índice en el journal, ganador) o None si no existe.
+        El ganador es None si la partida sigue abierta y "" si fue empate.
+        """
+        with self.lock:
+            moves = self.matches.get(match)
+            if moves is None:
+                return None
+            return list(moves), self.results.get(match)
+
+    def player_history(self, player: str, count: int = 10) -> List[Tuple[str, Optional[str]]]:
+        """
+        Últimas partidas del jugador, de la más reciente a la más antigua, con su ganador.
+        """
+        with self.lock:
+            matches = self.history.get(player, [])[-count:]
+            return [(match, self.results.get(match)) for match in reversed(matches)]
+
+    # ---------- Instantáneas ----------
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "players": self.players,
+                "board": self.board.snapshot(),
+                "matches": self.matches,
+                "results": self.results,
+                "history": self.history,
+            }
+
+    def restore(self, snapshot):
+        with self.lock:
+            self.players = snapshot["players"]
+            self.board = Leaderboard()
+            self.board.restore(snapshot["board"])
+            self.matches = snapshot["matches"]
+            self.results = snapshot["results"]
+            self.history = snapshot["history"]
+
+
+def game_command(raft, line):
+    """
+    Comandos "game ...", compartidos por la shell y el socket de administración.
+    Consultan las vistas locales: en un follower pueden ir algo por detrás del líder.
+    """
+    views = getattr(getattr(raft, "applier", None), "state_machine", None)
+    if not isinstance(views, GameViews):
+        return "Las vistas del juego no están activas en este nodo"
+    parts = line.split()
+    action = parts[1] if len(parts) > 1 else ""
+    usage = "Uso: game top [n] | game player <jugador> | game match <partida>"
+
+    if action == "top":
+        try:
+            count = int(parts[2]) if len(parts) > 2 else 10
+        except ValueError:
+            return usage
+        output = [f"[Clasificación] {len(views.board)} jugadores, aplicado hasta {raft.last_applied}"]
+        for rank, player, score in views.top(count):
+            output.append(f"  {rank:>6}. {player:<20} {score} puntos")
+        return "\n".join(output)
+
+    elif action == "player" and len(parts) > 2:
+        found = views.player(parts[2])
+        if found is None:
+            return f"El jugador {parts[2]} no ha jugado"
+        rank, (score, wins, draws, losses) = found
+        output = [f"[{parts[2]}] posición {rank}, {score} puntos "
+                  f"({wins} victorias, {draws} empates, {losses} derrotas)"]
+        for match, winner in views.player_history(parts[2]):
+            result = "en curso" if winner is None else "empate" if winner == "" else f"gana {winner}"
+            output.append(f"  {match:<20} {result}")
+        return "\n".join(output)
+
+    elif action == "match" and len(parts) > 2:
+        found = views.match(parts[2])
+        if found is None:
+            return f"La partida {parts[2]} no existe"
+        moves, winner = found
+        result = "en curso" if winner is None else "empate" if winner == "" else f"gana {winner}"
+        output = [f"[{parts[2]}] {result}"]
+        for player, choice, idx in moves:
+            output.append(f"  {player:<20} {choice:<8} journal[{idx - 1}] = {bytes(raft.journal[idx - 1][0]).decode()}")
+        return "\n".join(output)
+
+    return usage
@@ -1,39 +1,72 @@
 from fsm import FSM
-from raft.server import start_server, message_queue, connect_to_peer, connections, lock
-from raft import RaftNode
+from raft.server import start_server, message_queue, connect_to_peer, lock
+from raft import RaftNode, MultiRaft
+from game import GameViews
 import threading
 import time
 import sys
-from shell import start_shell
-from config import load_config
+import logging
+import logging.handlers
+from config import load_config, get_config
 
 load_config()
 
 done = threading.Event()
 
+# --headless: sin prompt_toolkit, log a fichero y administración por socket local
+args = sys.argv[1:]
+headless = "--headless" in args
+if headless:
+    args.remove("--headless")
+
 # Dirección propia
-my_host, my_port = sys.argv[1].split(":")
+my_host, my_port = args[0].split(":")
 my_port = int(my_port)
-my_addr = sys.argv[1]
+my_addr = args[0]
 
 # Otras direcciones
-others = sys.argv[2:]
+others = args[1:]
+
+if headless:
+    headless_config = get_config().get("headless", {})
+    file_handler = logging.FileHandler(headless_config.get("log_file", f"node-{my_port}.log"))
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    # Se escribe por bloques; los WARNING o superiores fuerzan el volcado
+    log_handler = logging.handlers.MemoryHandler(
+        headless_config.get("log_buffer", 1024), flushLevel=logging.WARNING, target=file_handler)
+    logging.basicConfig(level=logging.INFO, handlers=[log_handler])
 
 # Arranca el servidor
 threading.Thread(target=start_server, args=(my_host, my_port), daemon=True).start()
 
-# Conecta con los otros nodos
+# Conecta con los otros nodos (TCP_NODELAY y TCP_CORK al vaciar colas, configurables)
+transport_config = get_config().get("transport", {})
 for peer in others:
     host, port = peer.split(":")
-    threading.Thread(target=connect_to_peer, args=(host, int(port)), daemon=True).start()
+    threading.Thread(target=connect_to_peer, daemon=True,
+                     args=(host, int(port), transport_config.get("nodelay", True),
+                           transport_config.get("cork", True))).start()
 
-# Instancia de Raft
-raft = RaftNode(my_addr, others)
+# Instancia de Raft (varios grupos si se configura raft.groups > 1; las vistas
+# del juego solo se mantienen con un único grupo)
+num_groups = get_config().get("raft", {}).get("groups", 1)
+if num_groups > 1:
+    raft = MultiRaft(my_addr, others, num_groups)
+else:
+    raft = RaftNode(my_addr, others, state_machine=GameViews())
 
-start_shell(raft, done)
+if headless:
+    from admin import start_admin_server
+    admin_socket = headless_config.get("admin_socket", f"/tmp/piedra-papel-tijeras-{my_port}.sock")
+    start_admin_server(raft, done, admin_socket)
+else:
+    from shell import start_shell
+    start_shell(raft, done)
 
 # Bucle principal
 while not done.is_set():
     raft.fire()
     time.sleep(1)
 
+logging.shutdown()
+
@@ -0,0 +1,175 @@
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Intervalo mínimo entre muestras: con 0 el hilo no hace otra cosa que muestrear
+MIN_INTERVAL = 0.0005
+
+
+class SamplingProfiler:
+    """
+    Perfilador por muestreo de todos los hilos (bucle de Raft, lectores de
+    handle_client, UI...) usando sys._current_frames. Acumula pilas en formato
+    "collapsed" (hilo;módulo:función;... cuenta), el que usan flamegraph.pl
+    y speedscope.
+
+    El coste propio se mide en cada muestra. Si supera max_overhead (fracción
+    del tiempo real) el intervalo se duplica, y vuelve a bajar hacia el
+    configurado cuando hay margen.
+    """
+
+    def __init__(self, interval=0.005, max_overhead=0.01):
+        self.base_interval = interval
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.stacks = Counter()
+        self.samples = 0
+        self.sampling_time = 0.0
+        self.started_at = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self.sampling_time = 0.0
+        self.interval = max(self.base_interval, MIN_INTERVAL)
+        self.started_at = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.is_running():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+
+    def overhead(self):
+        elapsed = time.perf_counter() - self.started_at if self.is_running() else self.elapsed
+        return self.sampling_time / elapsed if elapsed else 0.0
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            t0 = time.perf_counter()
+            self._sample(me)
+            self.sampling_time += time.perf_counter() - t0
+            self.samples += 1
+            self._adjust_interval()
+
+    def _sample(self, me):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            with self._lock:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def _adjust_interval(self):
+        overhead = self.overhead()
+        if overhead > self.max_overhead:
+            self.interval = min(max(self.interval * 2, MIN_INTERVAL), 1.0)
+        elif overhead < self.max_overhead / 2 and self.interval > self.base_interval:
+            self.interval = max(self.interval / 2, self.base_interval, MIN_INTERVAL)
+
+    def dump(self, path):
+        with self._lock:
+            stacks = self.stacks.most_common()
+        with open(path, 'w') as f:
+            for stack, count in stacks:
+                f.write(f"{stack} {count}\n")
+        return len(stacks)
+
+
+class TickProfiler:
+    """
+    Perfila con cProfile las próximas n llamadas a fire() de un nodo Raft y
+    guarda las estadísticas en path (legibles con pstats o snakeviz).
+    fire() se sustituye en la instancia y se restaura al terminar.
+    """
+
+    def __init__(self, raft, ticks, path):
+        self.raft = raft
+        self.remaining = ticks
+        self.path = path
+        self.profile = cProfile.Profile()
+        self.done = threading.Event()
+        raft.fire = self._fire
+
+    def _fire(self):
+        self.profile.enable()
+        try:
+            type(self.raft).fire(self.raft)
+        finally:
+            self.profile.disable()
+        self.remaining -= 1
+        if self.remaining <= 0:
+            del self.raft.fire
+            self.profile.dump_stats(self.path)
+            self.done.set()
+            logging.info(f"cProfile de fire() guardado en {self.path}")
+
+
+profiler = SamplingProfiler()
+
+
+def profile_command(raft, line):
+    """
+    Comandos "profile ...", compartidos por la shell y el socket de administración.
+    """
+    parts = line.split()
+    action = parts[1] if len(parts) > 1 else ""
+    usage = "Uso: profile start [ms] | profile stop | profile dump [fichero] | profile ticks N [fichero]"
+
+    if action == "start":
+        if len(parts) > 2:
+            try:
+                interval = float(parts[2]) / 1000
+            except ValueError:
+                return usage
+            if not interval > 0:
+                return usage
+            profiler.base_interval = interval
+        profiler.start()
+        return (f"Profiler iniciado: intervalo {profiler.base_interval * 1000:.1f} ms, "
+                f"sobrecoste máximo {profiler.max_overhead:.1%}")
+
+    elif action == "stop":
+        profiler.stop()
+        return (f"Profiler detenido: {profiler.samples} muestras en {profiler.elapsed:.1f} s, "
+                f"sobrecoste {profiler.overhead():.2%}, intervalo final {profiler.interval * 1000:.1f} ms")
+
+    elif action == "dump":
+        path = parts[2] if len(parts) > 2 else f"profile-{int(time.time())}.folded"
+        stacks = profiler.dump(path)
+        return f"{stacks} pilas distintas ({profiler.samples} muestras) guardadas en {path}"
+
+    elif action == "ticks":
+        try:
+            ticks = int(parts[2]) if len(parts) > 2 else 100
+        except ValueError:
+            return usage
+        path = parts[3] if len(parts) > 3 else f"fire-{int(time.time())}.prof"
+        TickProfiler(raft, ticks, path)
+        return f"cProfile activo durante {ticks} llamadas a fire(); se guardará en {path}"
+
+    return usage
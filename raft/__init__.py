@@ -1 +1,2 @@
 from .raft import RaftNode
+from .multi import MultiRaft
@@ -0,0 +1,237 @@
+import collections
+import gc
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .commands import decode_session
+from .sessions import SessionTable
+
+Entry = Tuple[bytes, int, int]
+
+# Latencias commit -> aplicación que se conservan para estadísticas
+LATENCY_SAMPLES = 4096
+
+
+class ApplyWorker:
+    """
+    Etapa de aplicación separada del bucle de consenso.
+
+    El bucle de Raft entrega las entradas comprometidas con offer(), que
+    nunca bloquea: si la cola acotada está llena, deja el resto para la
+    siguiente pasada de fire(). Un hilo propio las saca por lotes, las aplica
+    a la máquina de estados y publica last_applied al terminar cada lote.
+
+    Mientras la aplicación va atrasada (saturated), las propuestas esperan en
+    wait_for_room: la contrapresión frena a los clientes, no a los heartbeats.
+
+    La máquina de estados es cualquier objeto con apply(entries), donde
+    entries es una lista de (comando, índice, término) en orden; puede
+    devolver una lista con la respuesta de cada entrada. Los comandos con
+    sesión de cliente que ya se aplicaron no le llegan: se responden desde
+    la tabla de sesiones, y los callbacks registrados con wait_for se
+    invocan (desde este hilo) con la respuesta.
+    """
+
+    def __init__(self, state_machine=None, max_pending: int = 1024, max_batch: int = 256,
+                 last_applied: int = 0, max_sessions: int = 10000,
+                 snapshot_storer=None, snapshot_every: int = 100000):
+        self.state_machine = state_machine
+        self.sessions = SessionTable(max_sessions)
+        # (client_id, seq) -> (índice, término, callbacks) de los comandos propuestos aquí
+        self.waiters: Dict[Tuple[str, int], Tuple[int, int, List[Callable[[Any], None]]]] = {}
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.last_enqueued = last_applied
+        self.last_applied = last_applied
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self._queue = queue.Queue(max_pending)
+        # Instantánea periódica del estado aplicado (MetaStorer), para no reaplicar todo el journal
+        self.snapshot_storer = snapshot_storer
+        self.snapshot_every = snapshot_every
+        self.last_snapshot = last_applied
+        self._room = threading.Condition()
+        self._apply_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="raft-apply", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def offer(self, journal, commit_index: int) -> bool:
+        """
+        Encola sin bloquear las entradas comprometidas que aún no se han entregado.
+        Devuelve False si la cola se llena antes de llegar a commit_index.
+        """
+        now = time.perf_counter()
+        while self.last_enqueued < commit_index:
+            try:
+                self._queue.put_nowait((journal[self.last_enqueued], now))
+            except queue.Full:
+                return False
+            self.last_enqueued += 1
+        return True
+
+    def backlog(self, commit_index: int) -> int:
+        return commit_index - self.last_applied
+
+    def saturated(self, commit_index: int) -> bool:
+        return self.backlog(commit_index) >= self.max_pending
+
+    def wait_for_room(self, commit_index_fn, timeout: Optional[float]) -> bool:
+        """
+        Espera hasta que la aplicación tenga hueco o venza el timeout.
+        commit_index_fn se vuelve a evaluar en cada lote aplicado.
+        """
+        with self._room:
+            return self._room.wait_for(lambda: not self.saturated(commit_index_fn()), timeout)
+
+    def _take_batch(self) -> List[Tuple[Entry, float]]:
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def wait_for(self, client_id: str, seq: int, index: int, term: int, callback: Callable[[Any], None]):
+        """
+        Registra callback(respuesta) para cuando se aplique el comando (client_id, seq),
+        propuesto en (index, term). Si ya se aplicó, se invoca en el acto.
+        """
+        with self._apply_lock:
+            found, response = self.sessions.lookup(client_id, seq)
+            if not found:
+                pending = self.waiters.get((client_id, seq))
+                if pending is not None and pending[:2] == (index, term):
+                    pending[2].append(callback)
+                else:
+                    self.waiters[(client_id, seq)] = (index, term, [callback])
+                return
+        callback(response)
+
+    def pending_index(self, client_id: str, seq: int) -> Optional[Tuple[int, int]]:
+        pending = self.waiters.get((client_id, seq))
+        return None if pending is None else pending[:2]
+
+    def _apply(self, entries: List[Entry]) -> List[Tuple[Callable[[Any], None], Any]]:
+        fresh, sessions, answered, repeated = [], [], [], []
+        in_batch = {}
+        for entry in entries:
+            session = decode_session(entry[0])
+            if session is not None:
+                client_id, seq = session
+                found, response = self.sessions.duplicate(client_id, seq)
+                if found:
+                    answered.append((session, response))
+                    continue
+                if seq <= in_batch.get(client_id, -1):
+                    # Reintento dentro del mismo lote: se responde tras aplicar el original
+                    repeated.append(session)
+                    continue
+                in_batch[client_id] = seq
+            fresh.append(entry)
+            sessions.append(session)
+
+        results = None
+        if self.state_machine is not None and fresh:
+            try:
+                results = self.state_machine.apply(fresh)
+            except Exception:
+                logging.exception(f"Failed to apply entries {fresh[0][1]}-{fresh[-1][1]}")
+        for session, response in zip(sessions, results or [None] * len(fresh)):
+            if session is not None:
+                self.sessions.record(*session, response)
+                answered.append((session, response))
+        for session in repeated:
+            answered.append((session, self.sessions.duplicate(*session)[1]))
+
+        replies = []
+        for session, response in answered:
+            pending = self.waiters.pop(session, None)
+            if pending is not None:
+                replies.extend((callback, response) for callback in pending[2])
+        return replies
+
+    def snapshot(self) -> dict:
+        """
+        Estado aplicado (tabla de sesiones y, si la tiene, máquina de estados)
+        coherente con last_applied. Las estructuras no se copian: hay que
+        serializarlas antes de que se aplique el siguiente lote.
+        """
+        state = self.state_machine.snapshot() if hasattr(self.state_machine, "snapshot") else None
+        return {
+            "last_applied": self.last_applied,
+            "sessions": self.sessions.snapshot(),
+            "state": state,
+        }
+
+    def save_snapshot(self):
+        with self._apply_lock:
+            if self.snapshot_storer is None or self.last_applied == self.last_snapshot:
+                return
+            t0 = time.perf_counter()
+            self.snapshot_storer.storeMeta(self.snapshot())
+            self.last_snapshot = self.last_applied
+        logging.info(f"Snapshot at index {self.last_snapshot} saved in {time.perf_counter() - t0:.2f} s")
+
+    def load_snapshot(self, max_index: int) -> bool:
+        """
+        Restaura la instantánea guardada si no va por delante del journal (max_index).
+        """
+        if self.snapshot_storer is None:
+            return False
+        t0 = time.perf_counter()
+        # Cargar millones de objetos con el GC activo es varias veces más lento
+        gc.disable()
+        try:
+            snapshot = self.snapshot_storer.getMeta()
+            if not snapshot or snapshot["last_applied"] > max_index:
+                return False
+            self.restore(snapshot)
+        finally:
+            gc.enable()
+        logging.info(f"Snapshot at index {self.last_applied} loaded in {time.perf_counter() - t0:.2f} s")
+        return True
+
+    def restore(self, snapshot: dict):
+        """
+        Carga una instantánea tomada con snapshot(). Solo antes de start();
+        después basta con reaplicar las entradas posteriores a last_applied.
+        """
+        self.sessions.restore(snapshot["sessions"])
+        if snapshot["state"] is not None and hasattr(self.state_machine, "restore"):
+            self.state_machine.restore(snapshot["state"])
+        self.last_applied = self.last_enqueued = self.last_snapshot = snapshot["last_applied"]
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take_batch()
+            if not batch:
+                continue
+            entries = [entry for entry, _ in batch]
+            with self._apply_lock:
+                replies = self._apply(entries)
+                self.last_applied = entries[-1][1]
+            now = time.perf_counter()
+            self.latencies.extend(now - committed for _, committed in batch)
+            with self._room:
+                self._room.notify_all()
+            for callback, response in replies:
+                callback(response)
+            if self.snapshot_storer is not None and self.last_applied - self.last_snapshot >= self.snapshot_every:
+                self.save_snapshot()
@@ -1,20 +1,25 @@
 import json
-from typing import Tuple, List, Union
+from typing import Tuple, List, Union, Optional
 
 
-def encode_command(line: str) -> bytes:
+def encode_command(line: str, client_id: Optional[str] = None, seq: Optional[int] = None) -> bytes:
     """
     Convierte una línea de comando de texto en bytes (formato JSON serializado).
     Ejemplo: "set key1 value1" → b'{"action": "set", "args": ["key1", "value1"]}'
+    Con client_id y seq el comando lleva su sesión de cliente (ver raft.sessions).
     """
     parts = line.strip().split()
     if not parts:
         raise ValueError("Empty command line")
 
-    return json.dumps({
+    obj = {
         "action": parts[0],
         "args": parts[1:]
-    }).encode("utf-8")
+    }
+    if client_id is not None:
+        obj["client"] = client_id
+        obj["seq"] = seq
+    return json.dumps(obj).encode("utf-8")
 
 
 def encode_no_op() -> bytes:
@@ -34,6 +39,21 @@ def decode_command(data: Union[bytes, str]) -> Tuple[str, List[str]]:
     return obj["action"], obj.get("args", [])
 
 
+def decode_session(data: Union[bytes, str]) -> Optional[Tuple[str, int]]:
+    """
+    Devuelve (client_id, seq) si el comando lleva sesión de cliente, o None.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    # La mayoría de comandos no llevan sesión: se evita parsear el JSON
+    if b'"client"' not in data:
+        return None
+    obj = json.loads(data)
+    if "client" not in obj:
+        return None
+    return obj["client"], obj["seq"]
+
+
 # Ejemplos de uso:
 if __name__ == "__main__":
     raw = "set temperature 22"
@@ -0,0 +1,118 @@
+import lzma
+import struct
+import sys
+import zlib
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+Entry = Tuple[bytes, int, int]
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODECS = {None: CODEC_RAW, 'raw': CODEC_RAW, 'zlib': CODEC_ZLIB, 'lzma': CODEC_LZMA}
+
+# codec, crc32 del diccionario (0 si no hay), tamaño sin comprimir
+HEADER = struct.Struct('<BII')
+ENTRY_HEADER = struct.Struct('<QQI')
+
+MAX_DICT_SIZE = 32 * 1024
+
+
+def pack_entries(entries: Iterable[Entry]) -> bytes:
+    parts = []
+    for command, idx, term in entries:
+        parts.append(ENTRY_HEADER.pack(idx, term, len(command)))
+        parts.append(command)
+    return b''.join(parts)
+
+
+def unpack_entries(data: bytes) -> List[Entry]:
+    entries = []
+    offset = 0
+    while offset < len(data):
+        idx, term, size = ENTRY_HEADER.unpack_from(data, offset)
+        offset += ENTRY_HEADER.size
+        entries.append((bytes(data[offset:offset + size]), idx, term))
+        offset += size
+    return entries
+
+
+class BatchCodec:
+    """
+    Comprime un lote de entradas del journal en un único bloque.
+
+    El mismo bloque se guarda en el journal y se envía a los followers, de
+    modo que el líder comprime una sola vez. zlib admite un diccionario
+    entrenado (ver train_dictionary); lzma no.
+    """
+
+    def __init__(self, method: Optional[str] = 'zlib', level: Optional[int] = None,
+                 zdict: Optional[bytes] = None):
+        if method not in CODECS:
+            raise ValueError(f"Unknown compression method: {method}")
+        if zdict is not None and CODECS[method] != CODEC_ZLIB:
+            raise ValueError("Only zlib supports a preset dictionary")
+        self.codec = CODECS[method]
+        self.level = level
+        self.zdict = zdict
+        self.dict_id = zlib.crc32(zdict) if zdict else 0
+
+    def encode(self, entries: Iterable[Entry]) -> bytes:
+        raw = pack_entries(entries)
+        if self.codec == CODEC_ZLIB:
+            level = -1 if self.level is None else self.level
+            if self.zdict:
+                c = zlib.compressobj(level, zdict=self.zdict)
+            else:
+                c = zlib.compressobj(level)
+            body = c.compress(raw) + c.flush()
+        elif self.codec == CODEC_LZMA:
+            body = lzma.compress(raw, preset=6 if self.level is None else self.level)
+        else:
+            body = raw
+        return HEADER.pack(self.codec, self.dict_id, len(raw)) + body
+
+    def decode(self, payload: bytes) -> List[Entry]:
+        codec, dict_id, raw_size = HEADER.unpack_from(payload)
+        body = payload[HEADER.size:]
+        if dict_id and dict_id != self.dict_id:
+            raise ValueError("Batch was compressed with a different dictionary")
+        if codec == CODEC_ZLIB:
+            d = zlib.decompressobj(zdict=self.zdict) if dict_id else zlib.decompressobj()
+            raw = d.decompress(body) + d.flush()
+        elif codec == CODEC_LZMA:
+            raw = lzma.decompress(body)
+        else:
+            raw = body
+        if len(raw) != raw_size:
+            raise ValueError("Corrupted compressed batch")
+        return unpack_entries(raw)
+
+
+def train_dictionary(samples: Iterable[bytes], size: int = MAX_DICT_SIZE) -> bytes:
+    """
+    Construye un diccionario zlib con los comandos más repetidos.
+    zlib da preferencia al final del diccionario, así que los más
+    frecuentes se colocan al final.
+    """
+    chosen = []
+    total = 0
+    for sample, _ in Counter(samples).most_common():
+        if total + len(sample) > size:
+            continue
+        chosen.append(sample)
+        total += len(sample)
+    return b''.join(reversed(chosen))
+
+
+# Entrena un diccionario a partir de un journal existente:
+#   python -m raft.compression <journal> <diccionario>
+if __name__ == "__main__":
+    from .journal import FileJournal
+
+    journal = FileJournal(sys.argv[1])
+    zdict = train_dictionary(journal[i][0] for i in range(len(journal)))
+    with open(sys.argv[2], 'wb') as f:
+        f.write(zdict)
+    print(f"Dictionary: {len(zdict)} bytes from {len(journal)} entries")
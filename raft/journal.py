@@ -1,19 +1,44 @@
 # from PySyncObj, modified
 
 import os
+import logging
 import mmap
+import bisect
 import struct
 import shutil
+import zlib
 from typing import List, Tuple, Optional
 
 from .version import VERSION
 from .pickle import to_bytes, loads, dumps
+from .compression import BatchCodec
 
 
 class Journal:
     def add(self, command: bytes, idx: int, term: int):
         raise NotImplementedError
 
+    def addBatch(self, entries: List[Tuple[bytes, int, int]], payload: Optional[bytes] = None) -> Optional[bytes]:
+        """
+        Añade varias entradas. Los journals que comprimen devuelven el bloque
+        guardado para reutilizarlo en la red; payload permite guardar tal cual
+        un bloque recibido sin volver a comprimirlo.
+        """
+        for entry in entries:
+            self.add(*entry)
+        return None
+
+    def iterBatches(self, entryFrom: int, codec: Optional[BatchCodec] = None):
+        """
+        Recorre desde la posición entryFrom en bloques listos para enviar:
+        (posición de la primera entrada del bloque, payload de BatchCodec).
+        El primer bloque puede empezar antes de entryFrom. codec se usa para
+        las entradas que no estén ya guardadas como lote.
+        """
+        entries = [self[i] for i in range(entryFrom, len(self))]
+        if entries:
+            yield entryFrom, (codec or BatchCodec(None)).encode(entries)
+
     def clear(self):
         raise NotImplementedError
 
@@ -38,26 +63,63 @@ class Journal:
     def getRaftCommitIndex(self) -> int:
         raise NotImplementedError
 
+    def flush(self):
+        pass
+
     def onOneSecondTimer(self):
         pass
 
 
 class MemoryJournal(Journal):
-    def __init__(self):
+    def __init__(self, codec: Optional[BatchCodec] = None):
         self._journal: List[Tuple[bytes, int, int]] = []
+        self._codec = codec or BatchCodec(None)
+        # Por registro: (posición de su primera entrada, posición tras la última, bloque o None si es una entrada suelta)
+        self._records: List[Tuple[int, int, Optional[bytes]]] = []
         self._lastCommitIndex = 0
 
     def add(self, command: bytes, idx: int, term: int):
         self._journal.append((command, idx, term))
+        self._records.append((len(self._journal) - 1, len(self._journal), None))
+
+    def addBatch(self, entries: List[Tuple[bytes, int, int]], payload: Optional[bytes] = None) -> Optional[bytes]:
+        # El bloque se codifica una vez y se guarda: cada envío a un follower lo reutiliza
+        if payload is None:
+            payload = self._codec.encode(entries)
+        self._records.append((len(self._journal), len(self._journal) + len(entries), bytes(payload)))
+        self._journal.extend(entries)
+        return payload
+
+    def iterBatches(self, entryFrom: int, codec: Optional[BatchCodec] = None):
+        pos = bisect.bisect_right(self._records, (entryFrom, float('inf'))) - 1
+        for entryStart, entryEnd, payload in self._records[max(pos, 0):]:
+            if payload is not None:
+                yield entryStart, payload
+            else:
+                yield entryStart, (codec or self._codec).encode(self._journal[entryStart:entryEnd])
 
     def clear(self):
         self._journal.clear()
+        self._records.clear()
 
     def deleteEntriesFrom(self, entryFrom: int):
         del self._journal[entryFrom:]
+        del self._records[bisect.bisect_left(self._records, (entryFrom,)):]
+        if self._records and self._records[-1][1] > entryFrom:
+            # El último bloque queda cortado: se vuelve a codificar lo que sobrevive
+            entryStart = self._records.pop()[0]
+            self._records.append((entryStart, entryFrom, self._codec.encode(self._journal[entryStart:entryFrom])))
 
     def deleteEntriesTo(self, entryTo: int):
-        self._journal = self._journal[entryTo:]
+        records = self._records[max(bisect.bisect_right(self._records, (entryTo, float('inf'))) - 1, 0):]
+        entries = self._journal[entryTo:]
+        self.clear()
+        for entryStart, entryEnd, payload in records:
+            if entryStart >= entryTo:
+                self._records.append((entryStart - entryTo, entryEnd - entryTo, payload))
+                self._journal.extend(entries[entryStart - entryTo:entryEnd - entryTo])
+            elif entryEnd > entryTo:
+                self.addBatch(entries[max(entryStart - entryTo, 0):entryEnd - entryTo])
 
     def __getitem__(self, item: int):
         return self._journal[item]
@@ -95,8 +157,8 @@ class ResizableFile:
     def write(self, offset: int, values: bytes):
         size = len(values)
         if offset + size > self._mm.size():
+            new_size = max(int(self._mm.size() * self._resizeFactor), offset + size)
             try:
-                new_size = int(self._mm.size() * self._resizeFactor)
                 self._mm.resize(new_size)
             except SystemError:
                 self._extend(new_size - self._mm.size())
@@ -105,6 +167,13 @@ class ResizableFile:
     def read(self, offset: int, size: int) -> bytes:
         return self._mm[offset:offset + size]
 
+    def view(self, offset: int, size: int) -> memoryview:
+        """
+        Vista sin copia sobre el mmap. Hay que liberarla (release) antes de que
+        el fichero crezca: mmap no puede redimensionarse con vistas exportadas.
+        """
+        return memoryview(self._mm)[offset:offset + size]
+
     def _extend(self, bytesToAdd: int):
         self._mm.flush()
         self._mm.close()
@@ -145,6 +214,74 @@ class MetaStorer:
         return self._path
 
 
+# Estado duro de Raft: dos copias (slots) de tamaño fijo con número de secuencia y crc32
+HARD_STATE_SLOT = struct.Struct('<QQQH96s')
+HARD_STATE_SLOT_SIZE = 128
+assert HARD_STATE_SLOT.size + 4 <= HARD_STATE_SLOT_SIZE
+
+
+class HardStateStorer:
+    """
+    Guarda term, votedFor y commit index en un fichero de 256 bytes mapeado en
+    memoria. Cada escritura va al slot más antiguo y se sincroniza con un solo
+    msync; si se interrumpe, el otro slot sigue siendo válido y el crc32
+    descarta el incompleto. Sustituye a pickle + fichero temporal + rename.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(b'\0' * (2 * HARD_STATE_SLOT_SIZE))
+        self._f = open(path, 'r+b')
+        self._mm = mmap.mmap(self._f.fileno(), 2 * HARD_STATE_SLOT_SIZE)
+        self._seq, self._state = 0, (0, None, 0)
+        for slot in range(2):
+            loaded = self._readSlot(slot)
+            if loaded is not None and loaded[0] > self._seq:
+                self._seq, self._state = loaded[0], loaded[1:]
+
+    def _readSlot(self, slot: int):
+        offset = slot * HARD_STATE_SLOT_SIZE
+        data = self._mm[offset:offset + HARD_STATE_SLOT.size]
+        crc, = struct.unpack_from('<I', self._mm, offset + HARD_STATE_SLOT.size)
+        if crc != zlib.crc32(data):
+            return None
+        seq, term, commitIndex, votedForSize, votedFor = HARD_STATE_SLOT.unpack(data)
+        votedFor = votedFor[:votedForSize].decode('utf-8') if votedForSize else None
+        return seq, term, votedFor, commitIndex
+
+    def load(self) -> Tuple[int, Optional[str], int]:
+        return self._state
+
+    def store(self, term: int, votedFor: Optional[str], commitIndex: int, sync: bool = True):
+        """
+        sync=False deja la escritura en el mmap sin msync: sirve para el commit
+        index, que se puede recalcular, pero no para term ni votedFor.
+        """
+        if (term, votedFor, commitIndex) == self._state:
+            return
+        encoded = votedFor.encode('utf-8') if votedFor else b''
+        if len(encoded) > HARD_STATE_SLOT.size - 26:
+            raise ValueError(f"votedFor too long: {votedFor}")
+        self._seq += 1
+        data = HARD_STATE_SLOT.pack(self._seq, term, commitIndex, len(encoded), encoded)
+        offset = (self._seq % 2) * HARD_STATE_SLOT_SIZE
+        self._mm[offset:offset + HARD_STATE_SLOT.size] = data
+        self._mm[offset + HARD_STATE_SLOT.size:offset + HARD_STATE_SLOT.size + 4] = struct.pack('<I', zlib.crc32(data))
+        if sync:
+            self._mm.flush()
+        self._state = (term, votedFor, commitIndex)
+
+    def getPath(self):
+        return self._path
+
+    def _destroy(self):
+        self._mm.flush()
+        self._mm.close()
+        self._f.close()
+
+
 # Constantes para formato del journal
 JOURNAL_FORMAT_VERSION = 1
 APP_NAME = b'PYSYNCOBJ'
@@ -155,12 +292,20 @@ assert len(APP_NAME) < NAME_SIZE
 assert len(APP_VERSION) < VERSION_SIZE
 FIRST_RECORD_OFFSET = NAME_SIZE + VERSION_SIZE + 4 + 4
 LAST_RECORD_OFFSET_OFFSET = NAME_SIZE + VERSION_SIZE + 4
+# Bit alto del tamaño de registro: el registro es un lote comprimido (BatchCodec)
+BATCH_RECORD_FLAG = 0x80000000
+# Entradas por lote al reescribir el journal
+REWRITE_BATCH_SIZE = 256
 
 
 class FileJournal(Journal):
-    def __init__(self, journalFile: str):
+    def __init__(self, journalFile: str, codec: Optional[BatchCodec] = None):
+        self._journalPath = journalFile
         self._journalFile = ResizableFile(journalFile, defaultContent=self._getDefaultHeader())
         self._journal: List[Tuple[bytes, int, int]] = []
+        self._codec = codec or BatchCodec(None)
+        # Por registro: (posición de su primera entrada, offset de los datos, tamaño, es lote)
+        self._records: List[Tuple[int, int, int, bool]] = []
         self._metaStorer = MetaStorer(journalFile + '.meta')
         self._meta = self._metaStorer.getMeta()
         self._metaSaved = True
@@ -182,27 +327,67 @@ class FileJournal(Journal):
         currentOffset = FIRST_RECORD_OFFSET
         lastOffset = self._getLastRecordOffset()
         while currentOffset < lastOffset:
+            sizeField = self._journalFile.read(currentOffset, 4)
+            size = struct.unpack('<I', sizeField)[0] if len(sizeField) == 4 else 0
+            isBatch = size & BATCH_RECORD_FLAG
+            size &= ~BATCH_RECORD_FLAG
+            end = currentOffset + size + 8
+            if size == 0 or end > lastOffset or self._journalFile.read(end - 4, 4) != sizeField:
+                # Registro a medio escribir (vacío o con la cola distinta de la cabecera): se descarta desde aquí
+                logging.warning(f"Journal {self._journalPath}: incomplete record at offset {currentOffset}, "
+                                f"dropping {lastOffset - currentOffset} bytes")
+                break
+            data = self._journalFile.read(currentOffset + 4, size)
             try:
-                size = struct.unpack('<I', self._journalFile.read(currentOffset, 4))[0]
-                data = self._journalFile.read(currentOffset + 4, size)
-                idx, term = struct.unpack('<QQ', data[:16])
-                command = data[16:]
-                self._journal.append((command, idx, term))
-                currentOffset += size + 8
-            except Exception:
-                break  # Corrupción o truncamiento
+                if isBatch:
+                    entries = self._codec.decode(data)
+                else:
+                    idx, term = struct.unpack('<QQ', data[:16])
+                    entries = [(data[16:], idx, term)]
+            except Exception as e:
+                # Un registro completo que no se puede leer (otro diccionario, datos dañados)
+                # no es una cola rota: seguir truncaría y sobrescribiría entradas válidas
+                raise ValueError(f"Journal {self._journalPath}: cannot decode record at offset {currentOffset}: {e}") from e
+            self._records.append((len(self._journal), currentOffset + 4, size, bool(isBatch)))
+            self._journal.extend(entries)
+            currentOffset = end
         self._currentOffset = currentOffset
 
     def add(self, command: bytes, idx: int, term: int):
         self._journal.append((command, idx, term))
         data = struct.pack('<QQ', idx, term) + to_bytes(command)
-        wrapped = struct.pack('<I', len(data)) + data + struct.pack('<I', len(data))
-        self._journalFile.write(self._currentOffset, wrapped)
-        self._currentOffset += len(wrapped)
+        self._writeRecord(len(self._journal) - 1, data, False)
+
+    def addBatch(self, entries: List[Tuple[bytes, int, int]], payload: Optional[bytes] = None) -> Optional[bytes]:
+        if payload is None:
+            payload = self._codec.encode(entries)
+        self._journal.extend(entries)
+        self._writeRecord(len(self._journal) - len(entries), payload, True)
+        return payload
+
+    def _writeRecord(self, entryStart: int, data: bytes, isBatch: bool):
+        # Cabecera, datos y cola se escriben por separado para no concatenar copias
+        size = len(data)
+        sizeField = struct.pack('<I', size | BATCH_RECORD_FLAG if isBatch else size)
+        self._journalFile.write(self._currentOffset, sizeField)
+        self._journalFile.write(self._currentOffset + 4, data)
+        self._journalFile.write(self._currentOffset + 4 + size, sizeField)
+        self._records.append((entryStart, self._currentOffset + 4, size, isBatch))
+        self._currentOffset += size + 8
         self._setLastRecordOffset(self._currentOffset)
 
+    def iterBatches(self, entryFrom: int, codec: Optional[BatchCodec] = None):
+        # Los lotes se devuelven como vistas del mmap, sin copiarlos a bytes
+        pos = bisect.bisect_right(self._records, (entryFrom, float('inf'))) - 1
+        for entryStart, offset, size, isBatch in self._records[max(pos, 0):]:
+            if isBatch:
+                yield entryStart, self._journalFile.view(offset, size)
+            else:
+                yield entryStart, (codec or self._codec).encode([self._journal[entryStart]])
+
     def clear(self):
         self._journal.clear()
+        self._records.clear()
         self._setLastRecordOffset(FIRST_RECORD_OFFSET)
         self._currentOffset = FIRST_RECORD_OFFSET
 
@@ -213,16 +398,15 @@ class FileJournal(Journal):
         return len(self._journal)
 
     def deleteEntriesFrom(self, entryFrom: int):
-        self._journal = self._journal[:entryFrom]
-        self.clear()
-        for entry in self._journal:
-            self.add(*entry)
+        self._rewrite(self._journal[:entryFrom])
 
     def deleteEntriesTo(self, entryTo: int):
-        remaining = self._journal[entryTo:]
+        self._rewrite(self._journal[entryTo:])
+
+    def _rewrite(self, entries: List[Tuple[bytes, int, int]]):
         self.clear()
-        for entry in remaining:
-            self.add(*entry)
+        for i in range(0, len(entries), REWRITE_BATCH_SIZE):
+            self.addBatch(entries[i:i + REWRITE_BATCH_SIZE])
 
     def _destroy(self):
         self._journalFile._destroy()
@@ -243,6 +427,6 @@ class FileJournal(Journal):
             self._metaSaved = True
 
 
-def createJournal(journalFile: Optional[str] = None) -> Journal:
-    return MemoryJournal() if journalFile is None else FileJournal(journalFile)
+def createJournal(journalFile: Optional[str] = None, codec: Optional[BatchCodec] = None) -> Journal:
+    return MemoryJournal(codec) if journalFile is None else FileJournal(journalFile, codec)
 
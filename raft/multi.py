@@ -0,0 +1,109 @@
+import queue
+import zlib
+
+from .raft import RaftNode
+from .server import message_queue, broadcast, Message, send_to as server_send_to
+
+
+class MultiRaft:
+    """
+    Varios grupos Raft independientes sobre las mismas conexiones y el mismo bucle.
+
+    Las partidas se reparten entre grupos por match id. Los mensajes de cada
+    grupo viajan como "G<grupo> <mensaje>", salvo los heartbeats y sus acks,
+    que se agrupan en un único mensaje por peer en cada pasada de fire()
+    (los acks, solo al líder que envió cada heartbeat):
+
+        Heartbeats <addr> <grupo>:<term>:<seq>:<commit>:<último índice>:<su término>,...
+        HeartbeatAcks <addr> <grupo>:<term>:<seq>,...
+
+    El líder preferido de cada grupo rota entre los nodos del clúster para
+    que todos reciban escrituras.
+    """
+
+    def __init__(self, my_addr, others, num_groups, journal_prefix=None, inbox=None, send=None, send_to=None):
+        self.addr = my_addr
+        self.inbox = message_queue if inbox is None else inbox
+        self._send = broadcast if send is None else send
+        self._send_to = server_send_to if send_to is None else send_to
+        self._heartbeats = []
+        # Líder -> acks pendientes para él
+        self._acks = {}
+
+        members = sorted([my_addr] + list(others))
+        self.groups = []
+        for g in range(num_groups):
+            journal_file = None if journal_prefix is None else f"{journal_prefix}.g{g}"
+            self.groups.append(RaftNode(
+                my_addr, others, journal_file,
+                group=g, inbox=queue.Queue(), router=self,
+                preferred_leader=members[g % len(members)] == my_addr,
+            ))
+
+    def group_for(self, match_id):
+        return zlib.crc32(match_id.encode('utf-8')) % len(self.groups)
+
+    def node_for(self, match_id):
+        return self.groups[self.group_for(match_id)]
+
+    def propose(self, match_id, line):
+        """
+        Propone un comando en el grupo de la partida.
+        Devuelve el índice asignado o None si este nodo no lidera ese grupo.
+        """
+        return self.node_for(match_id).propose(line)
+
+    def submit(self, match_id, client_id, seq, line, callback):
+        """
+        Propone un comando de cliente (exactly-once, ver RaftNode.submit) en el grupo de la partida.
+        """
+        return self.node_for(match_id).submit(client_id, seq, line, callback)
+
+    def leaders(self):
+        return [node.group for node in self.groups if node.is_leader()]
+
+    # ---------- Transporte compartido ----------
+
+    def send(self, group, msg, payload=b'', addr=None):
+        parts = msg.split()
+        if parts[0] == "AppendEntries" and len(parts) == 7:
+            self._heartbeats.append(":".join([str(group), parts[1]] + parts[3:]))
+        elif parts[0] == "AppendEntriesAck":
+            self._acks.setdefault(addr, []).append(f"{group}:{parts[1]}:{parts[3]}")
+        elif addr is not None:
+            self._send_to(addr, f"G{group} {msg}", payload)
+        else:
+            self._send(f"G{group} {msg}", payload)
+
+    def flush(self):
+        if self._heartbeats:
+            self._send(f"Heartbeats {self.addr} {','.join(self._heartbeats)}")
+            self._heartbeats = []
+        for leader, acks in self._acks.items():
+            self._send_to(leader, f"HeartbeatAcks {self.addr} {','.join(acks)}")
+        self._acks = {}
+
+    def dispatch(self):
+        while True:
+            try:
+                addr, msg = self.inbox.get_nowait()
+            except queue.Empty:
+                return
+            head, _, rest = msg.partition(" ")
+            if head in ("Heartbeats", "HeartbeatAcks"):
+                sender, _, items = rest.partition(" ")
+                for item in items.split(","):
+                    g, term, seq, *commit = item.split(":")
+                    if head == "Heartbeats":
+                        inner = " ".join(["AppendEntries", term, sender, seq] + commit)
+                    else:
+                        inner = f"AppendEntriesAck {term} {sender} {seq}"
+                    self.groups[int(g)].inbox.put((addr, inner))
+            elif head.startswith("G"):
+                self.groups[int(head[1:])].inbox.put((addr, Message(rest, getattr(msg, 'payload', b''))))
+
+    def fire(self):
+        self.dispatch()
+        for node in self.groups:
+            node.fire()
+        self.flush()
@@ -1,16 +1,26 @@
 from fsm import FSM
-from .server import message_queue, connections, lock
-from .journal import createJournal
+from .server import message_queue, broadcast, send_to
+from .journal import createJournal, HardStateStorer, MetaStorer
 from .commands import encode_command
+from .compression import BatchCodec
+from .read import ReadTracker
+from .apply import ApplyWorker
+import collections
+import threading
 import time
 import random
 import logging
 from config import get_config
 
 class RaftNode:
-    def __init__(self, my_addr, others, journal_file=None):
+    def __init__(self, my_addr, others, journal_file=None, group=None, inbox=None, router=None,
+                 preferred_leader=None, hardstate_file=None, state_machine=None):
         self.addr = my_addr
         self.others = others
+        # Multi-Raft: grupo al que pertenece, cola propia y multiplexor de envíos
+        self.group = group
+        self.inbox = message_queue if inbox is None else inbox
+        self.router = router
         self.term = 0
         self.voted_for = None
         self.votes_received = set()
@@ -22,38 +32,116 @@ class RaftNode:
         min_timeout = raft_config.get("election_timeout_min", 4)
         max_timeout = raft_config.get("election_timeout_max", 10)
         self.election_timeout_range = (min_timeout, max_timeout)
+        if preferred_leader is not None:
+            # Reparto de liderazgo: el nodo preferido usa la mitad baja del rango y los demás
+            # la alta, de modo que ninguno baja de election_timeout_min
+            mid = (min_timeout + max_timeout) / 2
+            self.election_timeout_range = (min_timeout, mid) if preferred_leader else (mid, max_timeout)
         self.heartbeat_interval = raft_config.get("heartbeat_interval", 1)
 
+        # Lecturas linealizables: "read_index" o "lease"
+        self.read_mode = raft_config.get("read_mode", "read_index")
+        lease_duration = None
+        if self.read_mode == "lease":
+            # El lease nunca supera el mínimo timeout de elección, con margen por deriva de reloj
+            drift = raft_config.get("lease_clock_drift", 0.1)
+            lease_duration = min_timeout * (1 - drift)
+        self.reads = ReadTracker(len(others) // 2 + 1, lease_duration)
+        self.leader_noop_index = 0
+        self.last_leader_contact = 0
+
         self.reset_election_timeout()
         self.next_heartbeat_time = 0
 
+        # Compresión por lotes del journal y de la replicación ("zlib", "lzma" o None)
+        compression = raft_config.get("compression")
+        zdict = None
+        if raft_config.get("compression_dict"):
+            with open(raft_config["compression_dict"], 'rb') as f:
+                zdict = f.read()
+        self.codec = BatchCodec(compression, zdict=zdict)
+
         # Journal setup
-        self.journal = createJournal(journal_file)
+        self.journal = createJournal(journal_file, self.codec)
         if len(self.journal) == 0:
             idx = 1
             self.journal.add(encode_command("NO_OP"), idx, self.term)
 
         self.commit_index = self.journal.getRaftCommitIndex()
-        self.last_applied = 1
+        self.next_journal_timer = time.time() + 1
+
+        # Estado duro (term, voted_for, commit index): se persiste junto al journal
+        if hardstate_file is None and journal_file is not None:
+            hardstate_file = journal_file + '.state'
+        self.hard_state = HardStateStorer(hardstate_file) if hardstate_file else None
+        if self.hard_state is not None:
+            self.term, self.voted_for, commit_index = self.hard_state.load()
+            self.commit_index = max(self.commit_index, min(commit_index, len(self.journal)))
+        self.match_index = {}
+        self.next_index = {}
+        # Control de flujo por follower: AppendBatch sin confirmar (inicio y fin de
+        # cada uno), followers en modo sondeo (uno cada vez) con el índice desde el
+        # que se sondea, e instante del último avance
+        self.max_inflight = raft_config.get("max_inflight", 8)
+        self.inflight = {}
+        self.probing = set()
+        self.probe_from = {}
+        self.last_progress = {}
+
+        # Aplicación de las entradas comprometidas en un hilo aparte, con cola acotada
+        self.applier = ApplyWorker(state_machine,
+                                   max_pending=raft_config.get("apply_queue", 1024),
+                                   max_batch=raft_config.get("apply_batch", 256),
+                                   max_sessions=raft_config.get("max_sessions", 10000),
+                                   snapshot_every=raft_config.get("snapshot_every", 100000))
+        if journal_file is not None:
+            # Tras reiniciar se parte de la última instantánea y solo se reaplica la cola del journal
+            self.applier.snapshot_storer = MetaStorer(journal_file + '.snapshot')
+            if self.applier.load_snapshot(len(self.journal)):
+                self.commit_index = max(self.commit_index, self.last_applied)
+        self.apply_backpressure_timeout = raft_config.get("apply_backpressure_timeout", 1)
+        self.loop_thread = None
+        # Los clientes proponen desde sus propios hilos: el journal y el estado de
+        # replicación solo se tocan con este lock, que fire() mantiene en cada pasada
+        # (con FileJournal, un addBatch que redimensiona el mmap fallaría mientras
+        # el bucle tiene una vista exportada)
+        self.lock = threading.RLock()
+        self.applier.start()
 
         self.fsm = FSM("raft:leader", "follower", [
             # Follower
+            ("follower", self.has_stale_message, "follower", self.discard_message),
             ("follower", self.timeout_expired, "candidate", self.become_candidate),
             ("follower", self.has_append_entries, "follower", self.handle_append_entries),
+            ("follower", self.has_append_batch, "follower", self.handle_append_batch),
             ("follower", self.has_vote_request, "follower", self.handle_vote_request),
             ("follower", self.has_vote, "follower", self.ignore_vote),
+            ("follower", self.has_append_entries_ack, "follower", self.ignore_append_entries_ack),
+            ("follower", self.has_append_batch_ack, "follower", self.ignore_append_batch),
+            ("follower", self.has_reads, "follower", self.reject_reads),
 
             # Candidate
+            ("candidate", self.has_stale_message, "candidate", self.discard_message),
             ("candidate", self.timeout_expired, "follower", self.back_to_follower_due_to_timeout),
             ("candidate", self.received_majority_votes, "leader", self.become_leader),
             ("candidate", self.has_append_entries, "follower", self.handle_append_entries),
+            ("candidate", self.has_append_batch, "follower", self.handle_append_batch),
             ("candidate", self.has_vote_request, "candidate", self.handle_vote_request),
             ("candidate", self.has_vote, "candidate", self.handle_vote),
+            ("candidate", self.has_append_entries_ack, "candidate", self.ignore_append_entries_ack),
+            ("candidate", self.has_append_batch_ack, "candidate", self.ignore_append_batch),
+            ("candidate", self.has_reads, "candidate", self.reject_reads),
 
             # Leader
+            ("leader", self.has_stale_message, "leader", self.discard_message),
             ("leader", self.has_append_entries, "follower", self.handle_append_entries),
+            ("leader", self.has_append_batch, "follower", self.handle_append_batch),
             ("leader", self.has_vote_request, "leader", self.ignore_vote_request),
             ("leader", self.has_vote, "leader", self.ignore_vote),
+            ("leader", self.has_append_entries_ack, "leader", self.handle_append_entries_ack),
+            ("leader", self.has_append_batch_ack, "leader", self.handle_append_batch_ack),
+            ("leader", self.has_ready_reads, "leader", self.serve_reads),
+            ("leader", self.has_pending_reads, "leader", self.start_read),
             ("leader", self.time_for_heartbeat, "leader", self.send_heartbeat),
         ])
 
@@ -72,39 +160,82 @@ class RaftNode:
         return self.fsm.state == "candidate" and len(self.votes_received) > len(self.others) // 2
 
     def has_append_entries(self):
-        if not message_queue.empty():
-            addr, msg = message_queue.queue[0]
-            if msg.startswith("AppendEntries"):
-                _, term = msg.split()
-                if int(term) >= self.term:
+        if not self.inbox.empty():
+            addr, msg = self.inbox.queue[0]
+            parts = msg.split()
+            if parts[0] == "AppendEntries":
+                if int(parts[1]) >= self.term:
                     self.pending_msg = (addr, msg)
                     return True
         return False
 
     def has_vote_request(self):
-        if not message_queue.empty():
-            addr, msg = message_queue.queue[0]
-            if msg.startswith("VoteRequest"):
-                _, term, candidate = msg.split()
-                term = int(term)
-                if term > self.term or (term == self.term and (self.voted_for is None or self.voted_for == candidate)):
+        if not self.inbox.empty():
+            addr, msg = self.inbox.queue[0]
+            parts = msg.split()
+            if parts[0] == "VoteRequest":
+                # Se decide en handle_vote_request si se concede el voto
+                if int(parts[1]) >= self.term:
                     self.pending_msg = (addr, msg)
                     return True
         return False
 
     def has_vote(self):
-        if not message_queue.empty():
-            addr, msg = message_queue.queue[0]
-            if msg.startswith("Vote"):
-                _, term, voter = msg.split()
-                if int(term) == self.term:
+        if not self.inbox.empty():
+            addr, msg = self.inbox.queue[0]
+            parts = msg.split()
+            if parts[0] == "Vote":
+                if int(parts[1]) == self.term:
                     self.pending_msg = (addr, msg)
                     return True
         return False
 
+    def has_append_entries_ack(self):
+        if not self.inbox.empty():
+            addr, msg = self.inbox.queue[0]
+            if msg.startswith("AppendEntriesAck"):
+                self.pending_msg = (addr, msg)
+                return True
+        return False
+
+    def has_append_batch(self):
+        if not self.inbox.empty():
+            addr, msg = self.inbox.queue[0]
+            parts = msg.split(maxsplit=2)
+            if parts[0] == "AppendBatch" and int(parts[1]) >= self.term:
+                self.pending_msg = (addr, msg)
+                return True
+        return False
+
+    def has_stale_message(self):
+        # Un mensaje de un término anterior en cabeza de cola bloquearía al resto
+        if not self.inbox.empty():
+            addr, msg = self.inbox.queue[0]
+            parts = msg.split(maxsplit=2)
+            if parts[0] in ("AppendEntries", "AppendBatch", "VoteRequest", "Vote"):
+                return int(parts[1]) < self.term
+        return False
+
+    def has_append_batch_ack(self):
+        if not self.inbox.empty():
+            addr, msg = self.inbox.queue[0]
+            if msg.startswith("AppendBatchAck"):
+                self.pending_msg = (addr, msg)
+                return True
+        return False
+
     def time_for_heartbeat(self):
         return time.time() >= self.next_heartbeat_time
 
+    def has_reads(self):
+        return self.reads.has_work()
+
+    def has_pending_reads(self):
+        return self.reads.has_pending()
+
+    def has_ready_reads(self):
+        return self.reads.has_ready(self.last_applied)
+
     # ---------- Acciones ----------
 
     def become_candidate(self):
@@ -112,15 +243,25 @@ class RaftNode:
         self.voted_for = self.addr
         self.votes_received = {self.addr}
         logging.info(f"[Raft] {self.addr} becomes CANDIDATE (term {self.term})")
-        self.send_to_all(f"VoteRequest {self.term} {self.addr}")
+        self.persist_hard_state()
+        self.send_to_all(f"VoteRequest {self.term} {self.addr} {len(self.journal)} {self.journal[-1][2]}")
         self.reset_election_timeout()
 
     def become_leader(self):
         self.next_heartbeat_time = time.time()
         logging.info(f"[Raft] {self.addr} becomes LEADER (term {self.term})")
         # Add NO_OP to journal when becoming leader
+        self.match_index = {}
+        self.next_index = {o: len(self.journal) + 1 for o in self.others}
+        # Hasta el primer ack no se sabe dónde está cada follower: se empieza sondeando
+        self.inflight = {o: collections.deque() for o in self.others}
+        self.probing = set(self.others)
+        self.probe_from = dict(self.next_index)
+        self.last_progress = {o: time.time() for o in self.others}
         idx = len(self.journal) + 1
-        self.journal.add(b'NO_OP', idx, self.term)
+        self.replicate([(b'NO_OP', idx, self.term)])
+        # Las lecturas no pueden servirse hasta aplicar una entrada del propio término
+        self.leader_noop_index = idx
 
     def back_to_follower_due_to_timeout(self):
         self.voted_for = None
@@ -130,25 +271,50 @@ class RaftNode:
 
     def handle_append_entries(self):
         addr, msg = self.pending_msg
-        _, term = msg.split()
-        term = int(term)
+        parts = msg.split()
+        term = int(parts[1])
         if term > self.term:
             self.term = term
             self.voted_for = None
-        message_queue.get()
+            self.persist_hard_state()
+        self.inbox.get()
+        self.last_leader_contact = time.time()
         self.reset_election_timeout()
+        if len(parts) > 6:
+            # El heartbeat trae el commit index del líder y su última entrada: sin él un
+            # follower no aplicaría el último lote hasta la siguiente escritura
+            leader_commit, last_idx, last_term = int(parts[4]), int(parts[5]), int(parts[6])
+            if self.journal[-1][2] == term:
+                self.follow_commit(leader_commit, len(self.journal))
+            elif last_idx <= len(self.journal) and self.journal[last_idx - 1][2] == last_term:
+                self.follow_commit(leader_commit, last_idx)
+        # Se responde solo al líder, por la dirección en la que escucha (addr es la del socket aceptado)
+        if len(parts) > 3:
+            self.send_to(parts[2], f"AppendEntriesAck {self.term} {self.addr} {parts[3]}")
 
     def handle_vote_request(self):
         addr, msg = self.pending_msg
-        _, term, candidate = msg.split()
-        term = int(term)
+        parts = msg.split()
+        term, candidate = int(parts[1]), parts[2]
+        if term > self.term:
+            self.term = term
+            self.voted_for = None
+            self.votes_received = set()
+
+        # Solo se vota a candidatos cuyo journal esté al menos tan actualizado como el propio
+        up_to_date = True
+        if len(parts) > 4:
+            last_idx, last_term = int(parts[3]), int(parts[4])
+            up_to_date = (last_term, last_idx) >= (self.journal[-1][2], len(self.journal))
 
-        vote_granted = False
-        if term > self.term and self.voted_for is None:
+        if self.voted_for in (None, candidate) and up_to_date and not self.leader_lease_active():
             self.voted_for = candidate
-            self.send_to(addr, f"Vote {term} {self.addr}")
+        # El término y el voto deben estar en disco antes de responder
+        self.persist_hard_state()
+        if self.voted_for == candidate:
+            self.send_to(candidate, f"Vote {term} {self.addr}")
 
-        message_queue.get()
+        self.inbox.get()
         self.reset_election_timeout()
 
     def handle_vote(self):
@@ -157,46 +323,340 @@ class RaftNode:
         term = int(term)
         if self.fsm.state == "candidate" and term == self.term:
             self.votes_received.add(voter)
-        message_queue.get()
+        self.inbox.get()
         self.reset_election_timeout()
 
     def ignore_vote(self):
         logging.info("Ignored Vote")
-        message_queue.get()
+        self.inbox.get()
         self.reset_election_timeout()
 
     def ignore_vote_request(self):
         logging.info("Ignored VoteRequest")
-        message_queue.get()
+        self.inbox.get()
+        self.reset_election_timeout()
+
+    def handle_append_batch(self):
+        addr, msg = self.pending_msg
+        _, term, leader, prev_idx, prev_term, leader_commit = msg.split()
+        term, prev_idx, prev_term, leader_commit = int(term), int(prev_idx), int(prev_term), int(leader_commit)
+        if term > self.term:
+            self.term = term
+            self.voted_for = None
+            self.persist_hard_state()
+        self.inbox.get()
+        self.last_leader_contact = time.time()
         self.reset_election_timeout()
 
+        if prev_idx > len(self.journal) or (prev_idx > 0 and self.journal[prev_idx - 1][2] != prev_term):
+            # Hueco o conflicto: se indica hasta dónde coincide como mucho
+            hint = min(len(self.journal), prev_idx - 1)
+            self.send_to(leader, f"AppendBatchAck {self.term} {self.addr} {hint} 0")
+            return
+
+        # Un lote repetido o atrasado no debe borrar lo ya confirmado: solo se
+        # trunca desde la primera entrada cuyo término no coincide
+        payload = msg.payload
+        entries = self.codec.decode(payload)
+        known = 0
+        while known < len(entries) and prev_idx + known < len(self.journal):
+            if self.journal[prev_idx + known][2] != entries[known][2]:
+                self.journal.deleteEntriesFrom(prev_idx + known)
+                break
+            known += 1
+        if known < len(entries):
+            # El bloque se guarda tal cual (sin recomprimir) si entra entero
+            self.journal.addBatch(entries[known:], payload if known == 0 else None)
+        # Lo confirmado cuenta para la mayoría del líder: tiene que estar en disco antes del ack
+        self.journal.flush()
+        last = prev_idx + len(entries)
+        # Si la última entrada es del término del líder, todo el journal coincide con el suyo
+        match = max(last, len(self.journal)) if self.journal[-1][2] == term else last
+        self.follow_commit(leader_commit, match)
+        self.send_to(leader, f"AppendBatchAck {self.term} {self.addr} {match} 1")
+
+    def ignore_append_batch(self):
+        self.inbox.get()
+
+    def discard_message(self):
+        addr, msg = self.inbox.get()
+        logging.info(f"Discarded stale message: {msg[:40]}")
+
+    def handle_append_batch_ack(self):
+        addr, msg = self.pending_msg
+        _, term, voter, match, success = msg.split()
+        self.inbox.get()
+        if int(term) != self.term:
+            return
+        match = int(match)
+        inflight = self.inflight.setdefault(voter, collections.deque())
+        if success == "1":
+            self.last_progress[voter] = time.time()
+            self.match_index[voter] = max(self.match_index.get(voter, 0), match)
+            self.next_index[voter] = max(self.next_index.get(voter, 0), self.match_index[voter] + 1)
+            while inflight and inflight[0][1] <= match:
+                inflight.popleft()
+            self.probing.discard(voter)
+            self.advance_commit_index()
+            self.send_entries(voter)
+            return
+        # Un rechazo solo hace retroceder si indica un punto anterior a lo que ya se
+        # sondea (o se envía): los rechazos de lotes enviados antes del último
+        # retroceso, o por debajo de lo ya confirmado, son antiguos y se ignoran
+        limit = self.probe_from[voter] if voter in self.probing else self.next_index.get(voter, len(self.journal) + 1)
+        if self.match_index.get(voter, 0) <= match and match + 1 < limit:
+            self.last_progress[voter] = time.time()
+            self.start_probe(voter, match + 1)
+            self.send_entries(voter)
+
+    def handle_append_entries_ack(self):
+        addr, msg = self.pending_msg
+        _, term, voter, seq = msg.split()
+        if int(term) == self.term:
+            self.reads.ack(int(seq), voter)
+        self.inbox.get()
+
+    def ignore_append_entries_ack(self):
+        self.inbox.get()
+
+    def start_read(self):
+        # Con lease vigente se responde sin red; si no, se adelanta el heartbeat
+        if not self.reads.serve_local(self.read_index()):
+            self.send_heartbeat()
+
+    def serve_reads(self):
+        for read_index, callback in self.reads.take_ready(self.last_applied):
+            callback(read_index)
+
+    def reject_reads(self):
+        for callback in self.reads.fail_all():
+            callback(None)
+
     def send_heartbeat(self):
-        self.send_to_all(f"AppendEntries {self.term}")
+        seq = self.reads.open_round(self.read_index(), self.addr)
+        self.send_to_all(f"AppendEntries {self.term} {self.addr} {seq} {self.commit_index} "
+                         f"{len(self.journal)} {self.journal[-1][2]}")
         self.next_heartbeat_time = time.time() + self.heartbeat_interval
+        now = time.time()
+        for voter in self.others:
+            inflight = self.inflight.setdefault(voter, collections.deque())
+            if inflight and now - self.last_progress.get(voter, now) > self.heartbeat_interval:
+                # Sin avances durante un intervalo: los lotes se han perdido o el follower
+                # está atascado. Se vuelve a sondear desde el primero sin confirmar; como
+                # mucho un lote repetido por intervalo, que el follower acepta sin perder nada
+                self.start_probe(voter, inflight[0][0] + 1)
+                self.last_progress[voter] = now
+            self.send_entries(voter)
 
     # ---------- Utilidades ----------
 
     def fire(self):
-        self.fsm.fire()
+        self.loop_thread = threading.get_ident()
+        with self.lock:
+            # Una transición por mensaje: se vacía lo que ya hay en la cola (más una
+            # pasada para timeouts y heartbeats) en lugar de un mensaje por tick
+            for _ in range(self.inbox.qsize() + 1):
+                self.fsm.fire()
+            self.applier.offer(self.journal, self.commit_index)
+            if time.time() >= self.next_journal_timer:
+                # Metadatos del journal (commit index) sin sync en cada cambio
+                self.journal.onOneSecondTimer()
+                self.next_journal_timer = time.time() + 1
+
+    @property
+    def last_applied(self):
+        return self.applier.last_applied
+
+    def persist_hard_state(self, sync=True):
+        # sync=False solo para el commit index, que se puede reconstruir tras un fallo
+        if self.hard_state is not None:
+            self.hard_state.store(self.term, self.voted_for, self.commit_index, sync)
 
     def is_leader(self):
         return self.fsm.state == "leader"
 
-    def send_to_all(self, msg):
+    def propose(self, line):
+        """
+        Añade un comando al journal y lo replica si este nodo es líder.
+        Devuelve el índice asignado o None si no es líder.
+        """
+        return self.propose_batch([line])
+
+    def propose_batch(self, lines):
+        """
+        Propone varios comandos como un único lote (un registro y un mensaje).
+        Devuelve el índice del último, o None si no es líder o si la aplicación
+        sigue saturada tras esperar apply_backpressure_timeout segundos.
+        """
+        proposed = self._propose([encode_command(line) for line in lines])
+        return None if proposed is None else proposed[0]
+
+    def submit(self, client_id, seq, line, callback):
+        """
+        Propone un comando de cliente para que se aplique una sola vez.
+        callback(respuesta) se invoca desde el hilo de aplicación cuando se
+        aplica, o en el acto si (client_id, seq) ya se había aplicado. Un
+        reintento de un comando que sigue en el journal espera a esa misma
+        entrada en lugar de añadir otra.
+        Devuelve False si no se ha podido aceptar (no es líder o no hay hueco).
+        """
+        found, response = self.applier.sessions.lookup(client_id, seq)
+        if found:
+            callback(response)
+            return True
+        if not self.is_leader():
+            return False
+        pending = self.applier.pending_index(client_id, seq)
+        if pending is not None:
+            index, term = pending
+            with self.lock:
+                still_there = index <= len(self.journal) and self.journal[index - 1][2] == term
+            if still_there:
+                self.applier.wait_for(client_id, seq, index, term, callback)
+                return True
+        proposed = self._propose([encode_command(line, client_id, seq)])
+        if proposed is None:
+            return False
+        self.applier.wait_for(client_id, seq, *proposed, callback)
+        return True
+
+    def _propose(self, commands):
+        if not self.is_leader():
+            return None
+        if self.applier.saturated(self.commit_index):
+            # Desde el propio bucle de Raft no se espera: el hueco solo llega si fire() sigue
+            timeout = 0 if threading.get_ident() == self.loop_thread else self.apply_backpressure_timeout
+            if not self.applier.wait_for_room(lambda: self.commit_index, timeout):
+                logging.warning(f"[Raft] Proposal rejected: {self.applier.backlog(self.commit_index)} entries pending apply")
+                return None
+        with self.lock:
+            # Mientras se esperaba hueco el nodo ha podido dejar de ser líder
+            if not self.is_leader():
+                return None
+            first = len(self.journal) + 1
+            entries = [(command, first + i, self.term) for i, command in enumerate(commands)]
+            self.replicate(entries)
+        return entries[-1][1:]
+
+    def replicate(self, entries):
+        """
+        Guarda un lote en el journal y lo envía a cada follower que tenga hueco en su ventana.
+        """
+        self.journal.addBatch(entries)
+        for voter in self.others:
+            self.send_entries(voter)
+        # El líder cuenta su journal en la mayoría: se escribe a disco mientras los followers reciben el lote
+        self.journal.flush()
+        self.advance_commit_index()
+
+    def start_probe(self, voter, index):
+        """
+        Pasa a sondear a voter desde index: ventana de un AppendBatch y se
+        olvidan los que estaban en vuelo (sus acks se siguen aceptando si
+        confirman algo; sus rechazos, no).
+        """
+        self.next_index[voter] = index
+        self.probe_from[voter] = index
+        self.inflight.setdefault(voter, collections.deque()).clear()
+        self.probing.add(voter)
+
+    def send_entries(self, voter):
+        """
+        Envía a voter las entradas que le faltan desde next_index sin superar
+        max_inflight AppendBatch sin confirmar (uno solo en modo sondeo). Los
+        bloques salen tal como están guardados en el journal (vistas del mmap
+        en FileJournal), sin copiarlos ni recomprimirlos; las vistas solo
+        existen con self.lock tomado, así que ningún addBatch las encuentra.
+        """
+        with self.lock:
+            inflight = self.inflight.setdefault(voter, collections.deque())
+            window = 1 if voter in self.probing else self.max_inflight
+            prev_idx = self.next_index.get(voter, len(self.journal) + 1) - 1
+            if len(inflight) >= window or prev_idx >= len(self.journal):
+                return
+            batches = self.batch_ranges(prev_idx)
+            try:
+                for start, end, payload in batches:
+                    prev_term = self.journal[start - 1][2] if start > 0 else 0
+                    try:
+                        self.send_to(voter, f"AppendBatch {self.term} {self.addr} {start} {prev_term} {self.commit_index}", payload)
+                    finally:
+                        if isinstance(payload, memoryview):
+                            payload.release()
+                    inflight.append((start, end))
+                    self.next_index[voter] = end + 1
+                    if len(inflight) >= window:
+                        return
+            finally:
+                batches.close()
+
+    def batch_ranges(self, entry_from):
+        """
+        Como journal.iterBatches, pero con la posición final de cada bloque:
+        (inicio, fin, payload). Al cerrarlo se libera el bloque leído por adelantado.
+        """
+        held = None
+        try:
+            for start, payload in self.journal.iterBatches(entry_from, self.codec):
+                previous, held = held, (start, payload)
+                if previous is not None:
+                    yield previous[0], start, previous[1]
+            if held is not None:
+                last, held = held, None
+                yield last[0], len(self.journal), last[1]
+        finally:
+            if held is not None and isinstance(held[1], memoryview):
+                held[1].release()
+
+    def follow_commit(self, leader_commit, matched):
+        """
+        En un follower: avanza el commit index hasta el del líder, sin pasar de
+        matched (hasta donde se sabe que el journal coincide con el suyo).
+        """
+        commit = min(leader_commit, matched)
+        if commit > self.commit_index:
+            self.commit_index = commit
+            self.journal.setRaftCommitIndex(commit)
+            self.persist_hard_state(sync=False)
+
+    def advance_commit_index(self):
+        # Índice replicado en una mayoría (el líder cuenta con todo su journal)
+        matches = sorted([len(self.journal)] + [self.match_index.get(o, 0) for o in self.others], reverse=True)
+        n = matches[len(self.others) // 2]
+        if n > self.commit_index and self.journal[n - 1][2] == self.term:
+            self.commit_index = n
+            self.journal.setRaftCommitIndex(n)
+            self.persist_hard_state(sync=False)
+
+    def read(self, callback):
+        """
+        Solicita una lectura linealizable sin escribir en el journal.
+        callback(read_index) se invoca desde el bucle de Raft cuando el estado
+        aplicado refleja todo lo comprometido antes de la petición, o
+        callback(None) si este nodo no es (o deja de ser) líder.
+        """
+        self.reads.submit(callback)
+
+    def read_index(self):
+        return max(self.commit_index, self.leader_noop_index)
+
+    def leader_lease_active(self):
+        # En modo lease no se vota mientras el líder actual pueda seguir sirviendo lecturas
+        if self.read_mode != "lease":
+            return False
+        return time.time() - self.last_leader_contact < self.election_timeout_range[0]
+
+    def send_to_all(self, msg, payload=b''):
         logging.info(f"<send_to_all> {msg}")
-        with lock:
-            for conn in connections:
-                try:
-                    conn.sendall(msg.encode('utf-8'))
-                except:
-                    pass
-
-    def send_to(self, addr, msg):
+        if self.router is not None:
+            self.router.send(self.group, msg, payload)
+        else:
+            broadcast(msg, payload)
+
+    def send_to(self, addr, msg, payload=b''):
         logging.info(f"<send> {msg}")
-        with lock:
-            for conn in connections:
-                try:
-                    conn.sendall(msg.encode('utf-8'))
-                except:
-                    pass
+        if self.router is not None:
+            self.router.send(self.group, msg, payload, addr)
+        else:
+            send_to(addr, msg, payload)
 
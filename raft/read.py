@@ -0,0 +1,125 @@
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+# Rondas sin confirmar que se conservan antes de fusionar las más antiguas
+MAX_OPEN_ROUNDS = 64
+
+ReadCallback = Callable[[Optional[int]], None]
+
+
+class ReadTracker:
+    """
+    Lecturas linealizables sin añadir entradas al journal.
+
+    ReadIndex: cada lectura toma el commit index del líder y espera a que una
+    ronda de heartbeats enviada después de recibirla sea confirmada por una
+    mayoría. Todas las lecturas pendientes al abrir la ronda comparten el
+    mismo heartbeat.
+
+    Lease: si lease_duration no es None, cada ronda confirmada extiende un
+    lease medido desde el envío del heartbeat. Mientras el lease es válido
+    el líder responde localmente, sin ida y vuelta por la red.
+
+    Los callbacks reciben el read index con el que se puede servir la
+    lectura, o None si el nodo deja de ser líder antes de confirmarla.
+    """
+
+    def __init__(self, quorum: int, lease_duration: Optional[float] = None):
+        self.quorum = quorum
+        self.lease_duration = lease_duration
+        self.lease_expires = 0.0
+        self.seq = 0
+        self._lock = threading.Lock()
+        self._pending: List[ReadCallback] = []
+        # seq -> [instante de envío, [(read_index, callback)], votantes]
+        self._rounds = {}
+        self._ready: List[Tuple[int, ReadCallback]] = []
+
+    def submit(self, callback: ReadCallback):
+        with self._lock:
+            self._pending.append(callback)
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def has_ready(self, applied_index: int) -> bool:
+        return any(read_index <= applied_index for read_index, _ in self._ready)
+
+    def has_work(self) -> bool:
+        return bool(self._pending or self._rounds or self._ready)
+
+    def lease_valid(self, now: Optional[float] = None) -> bool:
+        if self.lease_duration is None:
+            return False
+        return (time.time() if now is None else now) < self.lease_expires
+
+    def serve_local(self, read_index: int) -> bool:
+        """
+        Con lease vigente pasa las lecturas pendientes a listas sin abrir ronda.
+        """
+        with self._lock:
+            if not self.lease_valid():
+                return False
+            self._ready.extend((read_index, cb) for cb in self._pending)
+            self._pending = []
+            return True
+
+    def open_round(self, read_index: int, voter: str, now: Optional[float] = None) -> int:
+        """
+        Abre una ronda (un heartbeat) y le asigna las lecturas pendientes.
+        Devuelve el número de secuencia que deben devolver los followers.
+        """
+        with self._lock:
+            self.seq += 1
+            start = time.time() if now is None else now
+            reads = [(read_index, cb) for cb in self._pending]
+            self._pending = []
+            self._rounds[self.seq] = [start, reads, {voter}]
+            if len(self._rounds) > MAX_OPEN_ROUNDS:
+                # Confirmar una ronda posterior también vale para las anteriores
+                oldest, following = sorted(self._rounds)[:2]
+                self._rounds[following][1][:0] = self._rounds.pop(oldest)[1]
+            if self.quorum <= 1:
+                self._confirm(self.seq)
+            return self.seq
+
+    def ack(self, seq: int, voter: str):
+        with self._lock:
+            round_ = self._rounds.get(seq)
+            if round_ is None:
+                return
+            round_[2].add(voter)
+            if len(round_[2]) >= self.quorum:
+                self._confirm(seq)
+
+    def _confirm(self, seq: int):
+        start = self._rounds[seq][0]
+        for s in sorted(s for s in self._rounds if s <= seq):
+            self._ready.extend(self._rounds.pop(s)[1])
+        if self.lease_duration is not None:
+            self.lease_expires = max(self.lease_expires, start + self.lease_duration)
+
+    def take_ready(self, applied_index: int) -> List[Tuple[int, ReadCallback]]:
+        """
+        Devuelve las lecturas confirmadas cuyo read index ya está aplicado.
+        """
+        with self._lock:
+            servable = [r for r in self._ready if r[0] <= applied_index]
+            self._ready = [r for r in self._ready if r[0] > applied_index]
+            return servable
+
+    def fail_all(self) -> List[ReadCallback]:
+        """
+        Descarta todas las lecturas y el lease (p. ej. al dejar de ser líder).
+        """
+        with self._lock:
+            callbacks = list(self._pending)
+            for _, reads, _ in self._rounds.values():
+                callbacks.extend(cb for _, cb in reads)
+            callbacks.extend(cb for _, cb in self._ready)
+            self._pending = []
+            self._rounds.clear()
+            self._ready = []
+            self.lease_expires = 0.0
+            return callbacks
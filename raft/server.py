@@ -1,20 +1,210 @@
+import collections
 import socket
+import struct
 import threading
 import queue
 import time
 import logging
+from contextlib import contextmanager
 
 message_queue = queue.Queue()
-connections = []
+# Conexiones salientes por dirección "host:puerto" (la de la línea de comandos)
+peers = {}
 lock = threading.Lock()
 
+# Trama: longitud de la cabecera de texto, longitud del payload binario
+FRAME_HEADER = struct.Struct('<II')
+
+# Bytes pendientes por peer a partir de los cuales se descartan tramas nuevas
+PEER_QUEUE_BYTES = 8 * 1024 * 1024
+# Envío sin bloquear desde el hilo que llama (solo donde existe, p. ej. Linux)
+DONTWAIT = getattr(socket, 'MSG_DONTWAIT', 0)
+TCP_CORK = getattr(socket, 'TCP_CORK', None)
+
+
+class Message(str):
+    """
+    Mensaje recibido: el texto de la cabecera, con el payload binario aparte.
+    """
+    def __new__(cls, text, payload=b''):
+        msg = super().__new__(cls, text)
+        msg.payload = payload
+        return msg
+
+
+def encode_frame(msg, payload=b''):
+    """
+    Prefijo de la trama (cabecera incluida). El payload no se copia:
+    se envía a continuación con sendmsg.
+    """
+    header = msg.encode('utf-8')
+    return FRAME_HEADER.pack(len(header), len(payload)) + header
+
+
+def send_frame(conn, prefix, payload=b''):
+    # sendmsg (writev) puede enviar solo una parte: se avanza por los buffers restantes
+    buffers = [memoryview(prefix), memoryview(payload)] if len(payload) else [memoryview(prefix)]
+    while buffers:
+        sent = conn.sendmsg(buffers)
+        while buffers and sent >= len(buffers[0]):
+            sent -= len(buffers[0])
+            buffers.pop(0)
+        if buffers and sent:
+            buffers[0] = buffers[0][sent:]
+
+
+class Peer:
+    """
+    Conexión saliente con un nodo, con su propia cola de envío.
+
+    send() nunca bloquea al llamante. Si no hay nada pendiente se intenta
+    enviar en el acto sin bloquear (MSG_DONTWAIT) y sin copiar el payload;
+    lo que el socket no admite se copia a la cola y lo envía el hilo del
+    peer. Cuando la cola supera max_queued bytes las tramas nuevas se
+    descartan: un nodo lento o aislado pierde mensajes (Raft los reenvía)
+    en lugar de frenar los envíos al resto y el bucle del líder.
+
+    Con cork, mientras el hilo vacía una cola de varias tramas el socket
+    queda en TCP_CORK para agruparlas en segmentos completos; se suelta en
+    cuanto la cola se vacía, así que una trama suelta no espera.
+    """
+
+    def __init__(self, addr, sock, max_queued=PEER_QUEUE_BYTES, cork=False):
+        self.addr = addr
+        self.sock = sock
+        self.max_queued = max_queued
+        self.cork = cork
+        self.queued = 0
+        self.dropped = 0
+        self.closed = False
+        self._pending = collections.deque()
+        self._sending = False
+        self._ready = threading.Condition()
+        threading.Thread(target=self._run, name=f"peer-{addr}", daemon=True).start()
+
+    def send(self, prefix, payload=b''):
+        """
+        Devuelve False si la trama se ha descartado (cola llena o conexión cerrada).
+        """
+        with self._ready:
+            if self.closed:
+                return False
+            buffers = [memoryview(prefix), memoryview(payload)] if len(payload) else [memoryview(prefix)]
+            started = False
+            if not self._pending and not self._sending and DONTWAIT:
+                try:
+                    sent = self.sock.sendmsg(buffers, [], DONTWAIT)
+                except BlockingIOError:
+                    sent = 0
+                except OSError:
+                    self._close()
+                    return False
+                started = sent > 0
+                while buffers and sent >= len(buffers[0]):
+                    sent -= len(buffers[0])
+                    buffers.pop(0)
+                if not buffers:
+                    return True
+                buffers[0] = buffers[0][sent:]
+            size = sum(len(b) for b in buffers)
+            # Una trama empezada se completa siempre; solo se descartan tramas enteras
+            if not started and self.queued + size > self.max_queued:
+                self.dropped += 1
+                return False
+            self._pending.append(b''.join(buffers))
+            self.queued += size
+            self._ready.notify()
+            return True
+
+    def _run(self):
+        corked = False
+        while True:
+            with self._ready:
+                while not self._pending and not self.closed:
+                    self._ready.wait()
+                if self.closed:
+                    return
+                data = self._pending.popleft()
+                self._sending = True
+                if self.cork and self._pending and not corked:
+                    corked = set_cork(self.sock, True)
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                with self._ready:
+                    self._close()
+                return
+            with self._ready:
+                self._sending = False
+                self.queued -= len(data)
+                if corked and not self._pending:
+                    # Antes de volver al envío directo se sueltan los segmentos retenidos
+                    corked = not set_cork(self.sock, False)
+
+    def _close(self):
+        self.closed = True
+        self._pending.clear()
+        self.queued = 0
+        self._ready.notify()
+        logging.warning(f"Conexión con {self.addr} cerrada")
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def set_cork(conn, enabled):
+    """
+    Activa o desactiva TCP_CORK (solo Linux). Devuelve False si no se ha podido.
+    """
+    if TCP_CORK is None:
+        return False
+    try:
+        conn.setsockopt(socket.IPPROTO_TCP, TCP_CORK, 1 if enabled else 0)
+        return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def corked(conn):
+    """
+    Agrupa varias tramas en los mismos segmentos TCP (TCP_CORK, solo Linux).
+    """
+    cork = set_cork(conn, True)
+    try:
+        yield
+    finally:
+        if cork:
+            set_cork(conn, False)
+
+
+def read_frames(sock):
+    """
+    Generador de mensajes recibidos por un socket hasta que se cierra.
+    """
+    buffer = bytearray()
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            return
+        buffer += data
+        offset = 0
+        while len(buffer) - offset >= FRAME_HEADER.size:
+            header_size, payload_size = FRAME_HEADER.unpack_from(buffer, offset)
+            end = offset + FRAME_HEADER.size + header_size + payload_size
+            if len(buffer) < end:
+                break
+            start = offset + FRAME_HEADER.size
+            text = buffer[start:start + header_size].decode('utf-8')
+            yield Message(text, bytes(buffer[start + header_size:end]))
+            offset = end
+        del buffer[:offset]
+
 def handle_client(client_socket, address):
     logging.info(f"Conexión establecida con {address}")
     try:
-        while True:
-            message = client_socket.recv(1024).decode('utf-8')
-            if not message:
-                break
+        for message in read_frames(client_socket):
             message_queue.put((address, message))
             logging.info(f"<recv> {message}")
     finally:
@@ -30,15 +220,37 @@ def start_server(host, port):
         client_socket, addr = server.accept()
         threading.Thread(target=handle_client, args=(client_socket, addr), daemon=True).start()
 
-def connect_to_peer(addr, port):
+def connect_to_peer(addr, port, nodelay=True, cork=True):
     while True:
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             s.connect((addr, port))
+            if nodelay:
+                s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             with lock:
-                connections.append(s)
+                peers[f"{addr}:{port}"] = Peer(f"{addr}:{port}", s, cork=cork)
             logging.info(f"Conectado a {addr}:{port}")
             return
         except Exception:
             time.sleep(2)
 
+def broadcast(msg, payload=b''):
+    # La trama se codifica una vez y se comparte entre todas las conexiones;
+    # cada peer la envía o la encola sin bloquear a los demás
+    prefix = encode_frame(msg, payload)
+    with lock:
+        targets = list(peers.values())
+    for peer in targets:
+        peer.send(prefix, payload)
+
+def send_to(addr, msg, payload=b''):
+    """
+    Envía solo al peer addr, su dirección de escucha tal como aparece en la
+    línea de comandos ("host:puerto"). Devuelve False si aún no hay conexión
+    con él o si la trama se ha descartado: Raft lo reintenta.
+    """
+    peer = peers.get(addr)
+    if peer is None:
+        logging.debug(f"Sin conexión con {addr}: mensaje descartado")
+        return False
+    return peer.send(encode_frame(msg, payload), payload)
@@ -0,0 +1,63 @@
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+
+class SessionTable:
+    """
+    Sesiones de cliente para ejecutar cada comando una sola vez.
+
+    Cada cliente numera sus comandos (client_id, seq) y espera la respuesta
+    de uno antes de enviar el siguiente, así que basta con guardar el último
+    seq aplicado y su respuesta. Un reintento con seq <= al guardado es un
+    duplicado: se responde desde la tabla sin volver a aplicarlo.
+
+    La tabla forma parte del estado replicado: solo se modifica al aplicar
+    entradas comprometidas, en el mismo orden en todos los nodos, y por eso
+    el desalojo LRU (max_sessions) es determinista. Las consultas del líder
+    (lookup) no alteran el orden. Un cliente desalojado vuelve a empezar
+    como si fuera nuevo.
+    """
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        # client_id -> (seq, respuesta), del menos al más recientemente usado
+        self._sessions = OrderedDict()
+        self.hits = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def lookup(self, client_id: str, seq: int) -> Tuple[bool, Any]:
+        """
+        (True, respuesta) si (client_id, seq) ya se aplicó; (False, None) si no.
+        Para un seq anterior al último la respuesta ya no se conserva (None).
+        """
+        session = self._sessions.get(client_id)
+        if session is None or seq > session[0]:
+            return False, None
+        return True, session[1] if seq == session[0] else None
+
+    def duplicate(self, client_id: str, seq: int) -> Tuple[bool, Any]:
+        """
+        Como lookup, pero desde la aplicación: cuenta el acierto y renueva la sesión.
+        """
+        found, response = self.lookup(client_id, seq)
+        if found:
+            self.hits += 1
+            self._sessions.move_to_end(client_id)
+        return found, response
+
+    def record(self, client_id: str, seq: int, response: Any = None):
+        self._sessions[client_id] = (seq, response)
+        self._sessions.move_to_end(client_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def snapshot(self) -> List[Tuple[str, int, Any]]:
+        # En orden LRU, para que el desalojo siga igual tras restaurar
+        return [(client_id, seq, response) for client_id, (seq, response) in self._sessions.items()]
+
+    def restore(self, sessions: Optional[List[Tuple[str, int, Any]]]):
+        self._sessions = OrderedDict((client_id, (seq, response)) for client_id, seq, response in sessions or [])
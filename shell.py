@@ -1,11 +1,9 @@
 import logging
 from threading import Thread
-import time
 import asyncio
 import os
-import json
 
-from config import get_config, set_config, save_config
+from admin import available_commands, render_command
 from prompt_toolkit import Application
 from prompt_toolkit.application import get_app
 from prompt_toolkit.layout import Layout, HSplit
@@ -97,13 +95,6 @@ def bind_focus_keys(kb, input_window, output_window, log_window):
 
 
 def start_shell(raft, done):
-    from raft.server import message_queue
-
-    # Comandos disponibles
-    available_commands = [
-        "raft show", "mq show", "help", "exit",
-        "config show", "config set"
-    ]
     command_completer = WordCompleter(available_commands, ignore_case=True, sentence=True)
     history_file = os.path.expanduser("~/.piedra_papel_tijeras_history")
 
@@ -165,53 +156,17 @@ def start_shell(raft, done):
         if not line:
             return
 
-        if line == "raft show":
-            output = ["[Raft STATUS]"]
-            output.append(f"  Estado LE:        {raft.fsm.state}")
-            output.append(f"  Término actual:   {raft.term}")
-            output.append(f"  Votado por:       {raft.voted_for}")
-            output.append(f"  Soy líder:        {'sí' if raft.is_leader() else 'no'}")
-            if raft.fsm.state in ("follower", "candidate"):
-                remaining = max(0, raft.election_timeout - time.time())
-                output.append(f"  Timeout en:       {remaining:.2f} segundos")
-            if raft.fsm.state == "candidate":
-                output.append(f"  Votos recibidos:  {raft.votes_received}")
-            set_output("\n".join(output))
-
-        elif line == "mq show":
-            output = ["[Message Queue]"]
-            if message_queue.empty():
-                output.append("  (vacía)")
-            else:
-                for i, (addr, msg) in enumerate(list(message_queue.queue)):
-                    output.append(f"  [{i}] {addr}: {msg}")
-            set_output("\n".join(output))
-
-        elif line == "help":
-            output = ["Comandos disponibles:"]
-            for cmd in available_commands:
-                output.append(f"  {cmd}")
-            set_output("\n".join(output))
-
-        elif line == "exit":
+        if line == "exit":
             app.exit()
             done.set()
+            return
 
-        elif line == "config show":
-            set_output(json.dumps(get_config(), indent=2))
-
-        elif line.startswith("config set"):
-            try:
-                new_values = json.loads(cmd[len("show set"):].strip())
-                set_config(new_values)
-                save_config()
-                set_output("Configuration updated.")
-            except json.JSONDecodeError:
-                set_output("Invalid JSON.")
-
-        else:
+        output = render_command(raft, line)
+        if output is None:
             logging.warning("Comando no reconocido. Escribe 'help' para ver los comandos.")
             set_output(f"Comando no reconocido: {line}")
+        else:
+            set_output(output)
 
     # Lanzar UI
     Thread(target=app.run, daemon=True).start()
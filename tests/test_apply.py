@@ -0,0 +1,111 @@
+import queue
+import unittest
+
+from raft.apply import ApplyWorker
+from raft.commands import encode_command
+from raft.raft import RaftNode
+from raft.sessions import SessionTable
+from tests.test_raft import Recorder
+
+
+class Counter:
+    """
+    Máquina de estados de prueba: cuenta las entradas aplicadas.
+    """
+
+    def __init__(self):
+        self.applied = []
+
+    def apply(self, entries):
+        self.applied.extend(idx for _, idx, _ in entries)
+        return [f"r{idx}" for _, idx, _ in entries]
+
+
+class SessionTableTest(unittest.TestCase):
+    def test_lookup_answers_only_the_last_seq(self):
+        table = SessionTable()
+        table.record("c1", 2, "ok")
+        self.assertEqual(table.lookup("c1", 2), (True, "ok"))
+        self.assertEqual(table.lookup("c1", 1), (True, None))
+        self.assertEqual(table.lookup("c1", 3), (False, None))
+
+    def test_least_recently_used_is_evicted(self):
+        table = SessionTable(max_sessions=2)
+        table.record("c1", 1)
+        table.record("c2", 1)
+        # Un duplicado renueva la sesión; lookup (consulta del líder) no
+        table.duplicate("c1", 1)
+        table.lookup("c2", 1)
+        table.record("c3", 1)
+        self.assertEqual((table.lookup("c2", 1)[0], table.lookup("c1", 1)[0]), (False, True))
+        self.assertEqual((table.hits, table.evictions), (1, 1))
+
+    def test_restore_keeps_eviction_order(self):
+        table = SessionTable(max_sessions=2)
+        table.record("c1", 1)
+        table.record("c2", 1)
+        table.duplicate("c1", 1)
+        restored = SessionTable(max_sessions=2)
+        restored.restore(table.snapshot())
+        restored.record("c3", 1)
+        self.assertEqual(restored.lookup("c2", 1), (False, None))
+
+
+class ApplyDedupTest(unittest.TestCase):
+    def setUp(self):
+        self.state = Counter()
+        self.worker = ApplyWorker(self.state)
+        self.replies = []
+
+    def entry(self, idx, client_id, seq):
+        return encode_command("move m1 ana piedra", client_id, seq), idx, 1
+
+    def apply(self, *entries):
+        for callback, response in self.worker._apply(list(entries)):
+            callback(response)
+
+    def test_retry_in_same_batch_is_applied_once(self):
+        self.worker.wait_for("c1", 1, 2, 1, self.replies.append)
+        self.apply(self.entry(1, "c1", 1), self.entry(2, "c1", 1), self.entry(3, "c2", 1))
+        self.assertEqual(self.state.applied, [1, 3])
+        # El reintento (índice 2) recibe la respuesta del original
+        self.assertEqual(self.replies, ["r1"])
+
+    def test_retry_in_later_batch_is_answered_from_sessions(self):
+        self.apply(self.entry(1, "c1", 1))
+        self.worker.wait_for("c1", 1, 2, 1, self.replies.append)
+        self.apply(self.entry(2, "c1", 1), self.entry(3, "c1", 2))
+        self.assertEqual(self.state.applied, [1, 3])
+        self.assertEqual(self.replies, ["r1"])
+        self.assertEqual(self.worker.sessions.hits, 1)
+
+
+class SubmitTest(unittest.TestCase):
+    def setUp(self):
+        self.node = RaftNode("a:1", ["b:2", "c:3"], inbox=queue.Queue(), router=Recorder())
+        self.node.fsm.state = "leader"
+        self.node.become_leader()
+
+    def tearDown(self):
+        self.node.applier.stop()
+
+    def test_retry_joins_pending_entry(self):
+        replies = []
+        self.assertTrue(self.node.submit("c1", 1, "move m1 ana piedra", replies.append))
+        length = len(self.node.journal)
+        self.assertTrue(self.node.submit("c1", 1, "move m1 ana piedra", replies.append))
+        self.assertEqual(len(self.node.journal), length)
+        self.assertEqual(len(self.node.applier.waiters[("c1", 1)][2]), 2)
+
+    def test_retry_after_entry_was_replaced_proposes_again(self):
+        self.node.submit("c1", 1, "move m1 ana piedra", lambda response: None)
+        index, _ = self.node.applier.pending_index("c1", 1)
+        # Un líder posterior sobrescribió la entrada
+        self.node.journal.deleteEntriesFrom(index - 1)
+        self.node.submit("c1", 1, "move m1 ana piedra", lambda response: None)
+        self.assertEqual(self.node.applier.pending_index("c1", 1)[0], index)
+        self.assertEqual(len(self.node.journal), index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from raft.compression import BatchCodec
+from raft.journal import FileJournal, MemoryJournal, LAST_RECORD_OFFSET_OFFSET
+
+ZDICT = b"move piedra papel tijeras " * 20
+
+
+def batches(journal, count, size=2):
+    for b in range(count):
+        first = len(journal) + 1
+        journal.addBatch([(f"move m{b} p{i} piedra".encode(), first + i, 1) for i in range(size)])
+
+
+class FileJournalLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "journal")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reopen_with_same_dictionary(self):
+        journal = FileJournal(self.path, BatchCodec("zlib", zdict=ZDICT))
+        batches(journal, 3)
+        journal._destroy()
+        reopened = FileJournal(self.path, BatchCodec("zlib", zdict=ZDICT))
+        self.assertEqual(len(reopened), 6)
+        reopened._destroy()
+
+    def test_dictionary_mismatch_refuses_to_load(self):
+        journal = FileJournal(self.path, BatchCodec("zlib", zdict=ZDICT))
+        batches(journal, 3)
+        journal._destroy()
+        with self.assertRaises(ValueError):
+            FileJournal(self.path, BatchCodec("zlib"))
+
+    def test_torn_tail_is_dropped(self):
+        journal = FileJournal(self.path, BatchCodec("zlib"))
+        batches(journal, 3)
+        end = journal._currentOffset
+        journal._destroy()
+        # La cola del último registro no llegó a escribirse
+        with open(self.path, "r+b") as f:
+            f.seek(end - 4)
+            f.write(b"\0" * 4)
+        reopened = FileJournal(self.path, BatchCodec("zlib"))
+        self.assertEqual(len(reopened), 4)
+        batches(reopened, 1)
+        reopened._destroy()
+        again = FileJournal(self.path, BatchCodec("zlib"))
+        self.assertEqual(len(again), 6)
+        self.assertEqual(again[5][1], 6)
+        again._destroy()
+
+    def test_torn_tail_past_last_offset(self):
+        journal = FileJournal(self.path, BatchCodec("zlib"))
+        batches(journal, 2)
+        journal._destroy()
+        # La cabecera apunta más allá de lo escrito
+        with open(self.path, "r+b") as f:
+            f.seek(LAST_RECORD_OFFSET_OFFSET)
+            last, = struct.unpack("<I", f.read(4))
+            f.seek(LAST_RECORD_OFFSET_OFFSET)
+            f.write(struct.pack("<I", last + 64))
+        reopened = FileJournal(self.path, BatchCodec("zlib"))
+        self.assertEqual(len(reopened), 4)
+        reopened._destroy()
+
+
+class MemoryJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.codec = BatchCodec("zlib")
+        self.journal = MemoryJournal(self.codec)
+        batches(self.journal, 3)
+
+    def sent(self, entryFrom):
+        return [(start, self.codec.decode(payload)) for start, payload in self.journal.iterBatches(entryFrom)]
+
+    def test_batches_are_stored_encoded(self):
+        payload = self.journal.addBatch([(b"move m9 p1 piedra", 7, 1)])
+        blocks = list(self.journal.iterBatches(5))
+        self.assertEqual([start for start, _ in blocks], [4, 6])
+        self.assertIs(blocks[1][1], payload)
+
+    def test_truncated_batch_is_reencoded(self):
+        self.journal.deleteEntriesFrom(3)
+        self.assertEqual(self.sent(0), [(0, [self.journal[0], self.journal[1]]), (2, [self.journal[2]])])
+        batches(self.journal, 1)
+        self.assertEqual([start for start, _ in self.sent(3)], [3])
+
+    def test_compacted_prefix_shifts_batches(self):
+        self.journal.deleteEntriesTo(3)
+        self.assertEqual(len(self.journal), 3)
+        self.assertEqual(self.sent(0), [(0, [self.journal[0]]), (1, [self.journal[1], self.journal[2]])])
+
+
+if __name__ == "__main__":
+    unittest.main()
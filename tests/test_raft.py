@@ -0,0 +1,149 @@
+import queue
+import time
+import unittest
+
+from raft.raft import RaftNode
+from raft.server import Message
+
+
+class Recorder:
+    """
+    Transporte de prueba: guarda los mensajes enviados (destino, texto, payload).
+    """
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, group, msg, payload=b'', addr=None):
+        self.sent.append((addr, msg, bytes(payload)))
+
+    def take(self, kind):
+        found = [m for m in self.sent if m[1].split()[0] == kind]
+        self.sent = [m for m in self.sent if m[1].split()[0] != kind]
+        return found
+
+
+def fire_until(node, condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("condition not reached")
+        node.fire()
+        time.sleep(0.001)
+
+
+class LeaderTest(unittest.TestCase):
+    def setUp(self):
+        self.router = Recorder()
+        self.node = RaftNode("a:1", ["b:2", "c:3"], inbox=queue.Queue(), router=self.router)
+        self.node.fsm.state = "leader"
+        self.node.become_leader()
+
+    def tearDown(self):
+        self.node.applier.stop()
+
+    def ack_batches(self, voter):
+        for _, msg, payload in self.router.take("AppendBatch"):
+            parts = msg.split()
+            last = int(parts[3]) + len(self.node.codec.decode(payload))
+            self.node.inbox.put((voter, Message(f"AppendBatchAck {self.node.term} {voter} {last} 1")))
+
+    def test_read_served_once_applied(self):
+        self.ack_batches("b:2")
+        fire_until(self.node, lambda: self.node.last_applied >= self.node.leader_noop_index)
+
+        served = []
+        rounds = self.node.reads.seq
+        self.node.read(served.append)
+        fire_until(self.node, lambda: self.node.reads.seq > rounds)
+        self.node.inbox.put(("b:2", f"AppendEntriesAck {self.node.term} b:2 {self.node.reads.seq}"))
+        fire_until(self.node, lambda: served)
+        self.assertEqual(served, [self.node.leader_noop_index])
+
+    def ack(self, voter, match, success):
+        self.node.inbox.put((voter, f"AppendBatchAck {self.node.term} {voter} {match} {success}"))
+        self.node.fire()
+        return [int(msg.split()[3]) for addr, msg, _ in self.router.take("AppendBatch") if addr == voter]
+
+    def test_repeated_reject_probes_once(self):
+        self.router.take("AppendBatch")
+        # Dos lotes en vuelo rechazados con la misma pista: un solo retroceso
+        self.assertEqual(self.ack("b:2", 0, 0), [0])
+        self.assertEqual(self.ack("b:2", 0, 0), [])
+        self.assertEqual(self.node.next_index["b:2"], 2)
+
+    def test_reject_older_than_match_is_ignored(self):
+        self.router.take("AppendBatch")
+        self.ack("b:2", 2, 1)
+        self.node.propose("move m1 p1 piedra")
+        self.router.take("AppendBatch")
+        # Rechazo retrasado de un lote anterior al último ack
+        self.assertEqual(self.ack("b:2", 0, 0), [])
+        self.assertEqual((self.node.match_index["b:2"], self.node.next_index["b:2"]), (2, 4))
+
+
+class FollowerTest(unittest.TestCase):
+    def setUp(self):
+        self.router = Recorder()
+        self.node = RaftNode("b:2", ["a:1", "c:3"], inbox=queue.Queue(), router=self.router)
+
+    def tearDown(self):
+        self.node.applier.stop()
+
+    def append(self, term, entries, commit=0):
+        prev_idx = entries[0][1] - 1
+        prev_term = self.node.journal[prev_idx - 1][2]
+        payload = self.node.codec.encode(entries)
+        self.node.inbox.put(("x:0", Message(f"AppendBatch {term} a:1 {prev_idx} {prev_term} {commit}", payload)))
+        self.node.fire()
+        (addr, ack, _), = self.router.take("AppendBatchAck")
+        self.assertEqual(addr, "a:1")
+        return ack.split()[3:]
+
+    def terms(self):
+        return [self.node.journal[i][2] for i in range(len(self.node.journal))]
+
+    def test_repeated_batch_keeps_later_entries(self):
+        first = [(b"x", 2, 1), (b"y", 3, 1)]
+        self.assertEqual(self.append(1, first), ["3", "1"])
+        self.assertEqual(self.append(1, [(b"z", 4, 1), (b"w", 5, 1)]), ["5", "1"])
+        # El primer lote llega otra vez (reenvío o duplicado en la red)
+        self.assertEqual(self.append(1, first), ["5", "1"])
+        self.assertEqual(len(self.node.journal), 5)
+
+    def test_conflicting_entries_are_truncated(self):
+        self.append(1, [(b"x", 2, 1), (b"y", 3, 1), (b"z", 4, 1)])
+        # Un líder del término 2 sobrescribe desde la posición 3
+        self.assertEqual(self.append(2, [(b"y", 3, 1), (b"v", 4, 2)]), ["4", "1"])
+        self.assertEqual(self.terms(), [0, 1, 1, 2])
+        self.assertEqual(self.node.journal[3][0], b"v")
+
+    def test_stale_batch_does_not_ack_unverified_suffix(self):
+        self.append(1, [(b"x", 2, 1), (b"y", 3, 1), (b"z", 4, 1)])
+        # El líder del término 2 aún no ha comprobado las entradas 3 y 4 del término 1
+        self.assertEqual(self.append(2, [(b"x", 2, 1)]), ["2", "1"])
+        self.assertEqual(len(self.node.journal), 4)
+
+    def heartbeat(self, term, commit, last_idx, last_term):
+        self.node.inbox.put(("x:0", Message(f"AppendEntries {term} a:1 7 {commit} {last_idx} {last_term}")))
+        self.node.fire()
+        self.router.take("AppendEntriesAck")
+
+    def test_heartbeat_commits_last_batch(self):
+        self.append(1, [(b"x", 2, 1), (b"y", 3, 1)])
+        self.assertEqual(self.node.commit_index, 0)
+        # Con el clúster en reposo el commit solo llega en el heartbeat
+        self.heartbeat(1, 3, 3, 1)
+        self.assertEqual(self.node.commit_index, 3)
+
+    def test_heartbeat_does_not_commit_unverified_entries(self):
+        self.append(1, [(b"x", 2, 1), (b"y", 3, 1), (b"z", 4, 1)])
+        # El líder del término 2 tiene otra entrada 4: solo coincide hasta la 3
+        self.heartbeat(2, 4, 4, 2)
+        self.assertEqual(self.node.commit_index, 0)
+        self.heartbeat(2, 4, 3, 1)
+        self.assertEqual(self.node.commit_index, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from game.views import GameViews, Leaderboard
+from raft.commands import encode_command
+
+
+def board(scores, size=1024):
+    leaderboard = Leaderboard(size)
+    for player, score in scores:
+        leaderboard.insert(player, 0)
+        leaderboard.update(player, 0, score)
+    return leaderboard
+
+
+class LeaderboardTest(unittest.TestCase):
+    def setUp(self):
+        self.board = board([("a", 5), ("c", 3), ("b", 5), ("d", 3), ("e", 3), ("f", 0)])
+
+    def test_ties_share_rank(self):
+        self.assertEqual([self.board.rank(s) for s in (5, 3, 0)], [1, 3, 6])
+        # Dentro de un empate, en el orden en que se alcanzó la puntuación
+        self.assertEqual(self.board.top(3), [(1, "a", 5), (1, "b", 5), (3, "c", 3)])
+
+    def test_page_across_tie_groups(self):
+        self.assertEqual(self.board.page(2, 3), [(1, "b", 5), (3, "c", 3), (3, "d", 3)])
+        self.assertEqual(self.board.page(5, 10), [(3, "e", 3), (6, "f", 0)])
+        self.assertEqual(self.board.page(7, 10), [])
+
+    def test_grows_past_initial_size(self):
+        small = board([("a", 3), ("b", 1)], size=4)
+        small.update("b", 1, 40)
+        small.insert("c", 9)
+        self.assertEqual(small.top(3), [(1, "b", 40), (2, "c", 9), (3, "a", 3)])
+        self.assertEqual(small.rank(3), 3)
+
+    def test_snapshot_restore(self):
+        self.board.update("f", 0, 100)
+        restored = Leaderboard(size=2)
+        restored.restore(self.board.snapshot())
+        self.assertEqual(len(restored), 6)
+        self.assertEqual(restored.page(1, 10), self.board.page(1, 10))
+        self.assertEqual(restored.rank(5), 2)
+
+
+class GameViewsTest(unittest.TestCase):
+    def setUp(self):
+        self.views = GameViews()
+        self.idx = 0
+
+    def play(self, *lines):
+        entries = []
+        for line in lines:
+            self.idx += 1
+            entries.append((encode_command(line), self.idx, 1))
+        return self.views.apply(entries)
+
+    def test_match_is_scored_on_second_move(self):
+        self.assertEqual(self.play("move m1 ana piedra", "move m1 luis tijeras"), ["ok", "winner ana"])
+        self.assertEqual(self.play("move m2 ana papel", "move m2 luis papel"), ["ok", "draw"])
+        self.assertEqual(self.views.player("ana"), (1, [4, 1, 1, 0]))
+        self.assertEqual(self.views.player("luis"), (2, [1, 0, 1, 1]))
+        self.assertEqual(self.views.player_history("ana"), [("m2", ""), ("m1", "ana")])
+
+    def test_repeated_and_late_moves_are_rejected(self):
+        self.assertEqual(self.play("move m1 ana piedra", "move m1 ana papel"), ["ok", "error jugada repetida"])
+        self.assertEqual(self.play("move m1 luis papel", "move m1 eva tijeras"), ["winner luis", "error partida terminada"])
+        self.assertEqual(self.play("move m2 ana lagarto"), ["error jugada no válida"])
+        moves, winner = self.views.match("m1")
+        self.assertEqual([(p, c) for p, c, _ in moves], [("ana", "piedra"), ("luis", "papel")])
+        self.assertEqual(winner, "luis")
+        self.assertIsNone(self.views.player("eva"))
+
+    def test_snapshot_restore(self):
+        self.play("move m1 ana piedra", "move m1 luis tijeras", "move m2 eva papel")
+        restored = GameViews()
+        restored.restore(self.views.snapshot())
+        self.assertEqual(restored.top(3), self.views.top(3))
+        self.assertEqual(restored.match("m2"), self.views.match("m2"))
+        # La partida abierta sigue abierta tras restaurar
+        self.assertEqual(restored.apply([(encode_command("move m2 ana papel"), 4, 1)]), ["draw"])
+
+
+if __name__ == "__main__":
+    unittest.main()